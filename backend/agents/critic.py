@@ -1,7 +1,11 @@
 from langchain.agents import initialize_agent, Tool
 from langchain_openai import ChatOpenAI  # ✅ AIML API wrapper
 from langchain.schema import OutputParserException
+from typing import Dict, List
+import json
 import os
+
+from agents.plan_audit import audit_plan, format_findings
 # from .keys import ss   # ✅ AIML API key
 #or
 ######################################
@@ -19,18 +23,46 @@ llm = ChatOpenAI(
     model="gpt-5-chat-latest",
     api_key=AIML_API_KEY,
     base_url="https://api.aimlapi.com/v1",
-    temperature=0.2
+    temperature=0.2,
+    streaming=True,  # token callbacks for /simulate/stream
 )
 
 # --- Define tools ---
 def critique_plan(query: str) -> str:
-    return f"(Critique: Checked plan for unsafe routes or errors in {query})"
+    """
+    Tool: run the rule-based audit on a plan GeoJSON FeatureCollection (JSON string).
+    """
+    try:
+        plan = json.loads(query)
+        features = plan["features"] if isinstance(plan, dict) else plan
+    except (ValueError, KeyError, TypeError):
+        return "(Plan Auditor expects the plan as a GeoJSON FeatureCollection in JSON.)"
+    return format_findings(audit_plan(features))
+
+
+def critique_findings(scenario: str, findings: List[Dict[str, str]], plan_excerpt: str = "", callbacks=None) -> str:
+    """
+    One small LLM call: turn the local audit findings into a critique,
+    instead of a ReAct loop over every agent's full output.
+    """
+    prompt = (
+        f"{critic_prompt}\n"
+        f"Scenario: {scenario}\n"
+        f"Automated geometry audit findings:\n{format_findings(findings)}\n\n"
+        f"Logistics plan excerpt:\n{plan_excerpt[:800]}\n\n"
+        "Write a terse critique (max 6 bullets): which findings are real risks, what to change, "
+        "and anything the plan excerpt gets wrong given the findings."
+    )
+    return llm.invoke(prompt, config={"callbacks": callbacks}).content
 
 tools = [
     Tool(
         name="Plan Auditor",
         func=critique_plan,
-        description="Audit disaster response plans and catch unsafe errors"
+        description=(
+            "Audit a disaster response plan given as a GeoJSON FeatureCollection: "
+            "route proximity to damage zones, distance/duration sanity, staging-to-hospital coverage"
+        )
     )
 ]
 
@@ -7,6 +7,12 @@ import requests
 import random
 import datetime as dt
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from agents.hedging import hedged_call, request_timeout, HEDGE_ENABLED, EONET_HEDGE_DELAY_S
+from agents.state_backend import shared_cache, GEOCODE_TTL_S, HAZARD_TTL_S
+from orchestrator.stage_cache import normalize_scenario
 
 # from .keys import ss  # AIML API key for ChatOpenAI (AIML API wrapper)
 # AIML_API_KEY = ss
@@ -27,6 +33,7 @@ llm = ChatOpenAI(
     api_key=AIML_API_KEY,
     base_url="https://api.aimlapi.com/v1",
     temperature=0.2,
+    streaming=True,  # token callbacks for /simulate/stream
 )
 
 # ---------------- Utilities ----------------
@@ -37,6 +44,7 @@ def _haversine(lat1, lon1, lat2, lon2):
     a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
     return 2 * R * asin(sqrt(a))
 
+@shared_cache("geocode", ttl=GEOCODE_TTL_S, decode=tuple, cache_none=False, key=normalize_scenario)
 def _geocode(place: str):
     geolocator = Nominatim(user_agent="swarm-aid")
     try:
@@ -47,43 +55,59 @@ def _geocode(place: str):
         return None
     return (loc.latitude, loc.longitude)
 
+@shared_cache("eonet:events", ttl=HAZARD_TTL_S)
 def _fetch_eonet_events():
     # Open events; raise the limit a bit so we have options
     url = "https://eonet.gsfc.nasa.gov/api/v3/events"
     params = {"status": "open", "limit": 100}
-    r = requests.get(url, params=params, timeout=30)
+    r = requests.get(url, params=params, timeout=request_timeout(30))
     r.raise_for_status()
     return r.json().get("events", [])
 
-def eonet_hazard_scan(query: str) -> str:
+# Events the orchestrator already fetched for the current run (see use_hazard_events)
+_UNSET = object()
+_hazard_snapshot: ContextVar = ContextVar("hazard_snapshot", default=_UNSET)
+
+@contextmanager
+def use_hazard_events(events):
     """
-    Geocode the scenario location, pull current EONET hazards,
-    filter to those within ~1000km, and summarize implications.
+    Within this block, fetch_hazard_events (and so the EONET tool) returns
+    `events` instead of fetching again, so the agent sees the fingerprinted data.
     """
-    # 1) Geocode
-    loc = _geocode(query)
-    if not loc:
-        return f"Could not geocode location from: {query}. Provide a clearer place name."
-
-    lat, lon = loc
+    token = _hazard_snapshot.set(events)
+    try:
+        yield
+    finally:
+        _hazard_snapshot.reset(token)
 
-    # 2) Fetch hazards
+def fetch_hazard_events():
+    """
+    EONET events, or None when the demo-hazard fallback should be used.
+    Hedged: if EONET is slower than its p95, fall back to demo hazards
+    instead of waiting out the full 30 s timeout.
+    """
+    snapshot = _hazard_snapshot.get()
+    if snapshot is not _UNSET:
+        return snapshot
     try:
-        events = _fetch_eonet_events()
-    except Exception as e:
-        # non-blocking fallback
-        demo = [
-            {"title": "Severe Storms (demo)", "category": "Severe Storms", "distance_km": 25, "when": "now"},
-            {"title": "Flood Event (demo)", "category": "Floods", "distance_km": 120, "when": "12h"},
-        ]
-        demo_text = "\n".join(f"- {d['title']} · {d['category']} · ~{d['distance_km']} km · {d['when']}" for d in demo)
-        summary = llm.invoke(
-            f"(EONET unavailable) Location=({lat:.4f},{lon:.4f}). "
-            f"Given these demo hazards, analyze likely damage zones and vulnerable districts:\n{demo_text}"
-        )
-        return summary.content
+        if HEDGE_ENABLED:
+            _, events = hedged_call(_fetch_eonet_events, lambda: None, EONET_HEDGE_DELAY_S)
+            return events
+        return _fetch_eonet_events()
+    except Exception:
+        return None
+
+# Used when EONET is unreachable
+DEMO_HAZARDS = [
+    {"title": "Severe Storms (demo)", "category": "Severe Storms", "distance_km": 25, "when": "now"},
+    {"title": "Flood Event (demo)", "category": "Floods", "distance_km": 120, "when": "12h"},
+]
 
-    # 3) Distance filter + compact list
+def nearby_hazards(lat: float, lon: float, events, radius_km: float = 1000):
+    """
+    Filter raw EONET events to those within radius_km of (lat, lon).
+    Returns a compact list sorted by distance.
+    """
     nearby = []
     for ev in events:
         cats = [c.get("title", "") for c in ev.get("categories", [])]
@@ -101,13 +125,42 @@ def eonet_hazard_scan(query: str) -> str:
         except Exception:
             continue
         d_km = _haversine(lat, lon, ev_lat, ev_lon)
-        if d_km <= 1000:  # within 1000 km of scenario
+        if d_km <= radius_km:
             nearby.append({
                 "title": ev.get("title", "Event"),
                 "category": ", ".join(cats) if cats else "Uncategorized",
                 "distance_km": round(d_km),
                 "when": g.get("date", ""),
+                "lat": ev_lat,
+                "lon": ev_lon,
             })
+    return sorted(nearby, key=lambda x: x["distance_km"])
+
+def eonet_hazard_scan(query: str) -> str:
+    """
+    Geocode the scenario location, pull current EONET hazards,
+    filter to those within ~1000km, and summarize implications.
+    """
+    # 1) Geocode
+    loc = _geocode(query)
+    if not loc:
+        return f"Could not geocode location from: {query}. Provide a clearer place name."
+
+    lat, lon = loc
+
+    # 2) Fetch hazards
+    events = fetch_hazard_events()
+    if events is None:
+        # non-blocking fallback
+        demo_text = "\n".join(f"- {d['title']} · {d['category']} · ~{d['distance_km']} km · {d['when']}" for d in DEMO_HAZARDS)
+        summary = llm.invoke(
+            f"(EONET unavailable) Location=({lat:.4f},{lon:.4f}). "
+            f"Given these demo hazards, analyze likely damage zones and vulnerable districts:\n{demo_text}"
+        )
+        return summary.content
+
+    # 3) Distance filter + compact list (within 1000 km of scenario)
+    nearby = nearby_hazards(lat, lon, events)
 
     if not nearby:
         return (
@@ -116,7 +169,7 @@ def eonet_hazard_scan(query: str) -> str:
         )
 
     # 4) Summarize with LLM
-    nearby_sorted = sorted(nearby, key=lambda x: x["distance_km"])[:10]
+    nearby_sorted = nearby[:10]
     bullet = "\n".join(
         f"- {n['title']} · {n['category']} · ~{n['distance_km']} km · {n['when']}"
         for n in nearby_sorted
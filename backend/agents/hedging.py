@@ -0,0 +1,81 @@
+# agents/hedging.py
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Tuple
+
+# ----------------- Config -----------------
+# Set HEDGE_ENABLED=0 to go back to strictly sequential fallbacks.
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+# Roughly the p95 latency of each primary upstream; the secondary fires after this.
+ROUTE_HEDGE_DELAY_S = float(os.getenv("ROUTE_HEDGE_DELAY_S", "3.0"))
+EONET_HEDGE_DELAY_S = float(os.getenv("EONET_HEDGE_DELAY_S", "4.0"))
+# HTTP timeout for calls made inside a hedge, so a losing request frees its thread early
+HEDGE_TIMEOUT_S = float(os.getenv("HEDGE_TIMEOUT_S", "10"))
+
+_in_hedge: ContextVar = ContextVar("in_hedge", default=False)
+
+
+def request_timeout(default_s: float) -> float:
+    """
+    HTTP timeout for an upstream call: `default_s`, capped at HEDGE_TIMEOUT_S
+    when the call runs as one leg of a hedged_call.
+    """
+    return min(default_s, HEDGE_TIMEOUT_S) if _in_hedge.get() else default_s
+
+
+def _start(fn: Callable[[], Any]) -> Future:
+    """
+    Run fn on its own daemon thread. A shared pool would make a new call queue
+    behind losers still on the wire, and the hedge delay would then measure
+    queueing instead of upstream latency.
+    """
+    future: Future = Future()
+    ctx = copy_context()  # keep the caller's context vars (e.g. per-run snapshots)
+
+    def leg():
+        _in_hedge.set(True)
+        return fn()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(ctx.run(leg))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="hedge", daemon=True).start()
+    return future
+
+
+def hedged_call(primary: Callable[[], Any], secondary: Callable[[], Any], delay_s: float) -> Tuple[str, Any]:
+    """
+    Run `primary`; if it has not answered after `delay_s`, also start `secondary`
+    and return whichever succeeds first as ("primary" | "secondary", result).
+    If the primary fails before the delay, the secondary starts immediately.
+    Raises the last error only if both fail.
+
+    A request already on the wire cannot be interrupted, so the loser is left
+    to finish (within HEDGE_TIMEOUT_S, see request_timeout) and its result dropped.
+    """
+    futures = {_start(primary): "primary"}
+    done, _ = wait(futures, timeout=delay_s)
+    for f in done:
+        if f.exception() is None:
+            return "primary", f.result()
+
+    futures[_start(secondary)] = "secondary"
+    errors = []
+    pending = set(futures)
+    while pending:
+        # Futures that already finished come back at once, so a secondary
+        # that completed while we were submitting it is never missed
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in (f for f in futures if f in done):
+            if f.exception() is None:
+                return futures[f], f.result()
+            errors.append(f.exception())
+    raise errors[-1]
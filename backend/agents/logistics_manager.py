@@ -1,7 +1,6 @@
 # agents/logistics_manager.py
 from __future__ import annotations
 
-from functools import lru_cache
 from time import sleep
 from typing import Dict, Any, List, Tuple, Optional
 
@@ -14,6 +13,10 @@ from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderUnavailable, GeocoderTimedOut
 import os
 
+from agents.hedging import hedged_call, request_timeout, HEDGE_ENABLED, ROUTE_HEDGE_DELAY_S
+from agents.state_backend import shared_cache, GEOCODE_TTL_S, ROUTE_TTL_S
+from orchestrator.stage_cache import normalize_scenario
+
 # from .keys import ss, ORS_API_KEY  # ORS_API_KEY must exist in keys.py (string or "")
 #or
 ######################################
@@ -34,10 +37,12 @@ llm = ChatOpenAI(
     api_key=AIML_API_KEY,
     base_url="https://api.aimlapi.com/v1",
     temperature=0.2,
+    streaming=True,  # token callbacks for /simulate/stream
 )
 
 # ----------------- Geocoding -----------------
-@lru_cache(maxsize=256)
+# Keyed by the normalized place, so "Tokyo  Earthquake" and "tokyo earthquake" share an entry
+@shared_cache("geocode", ttl=GEOCODE_TTL_S, decode=tuple, cache_none=False, key=normalize_scenario)
 def _geocode(place: str) -> Optional[Tuple[float, float]]:
     """
     Convert place name into (lat, lon) with sane timeouts and retry.
@@ -59,6 +64,7 @@ def _geocode(place: str) -> Optional[Tuple[float, float]]:
 
 
 # ----------------- Routing Engines -----------------
+@shared_cache("route:osrm", ttl=ROUTE_TTL_S)
 def _route_osrm(start_lat: float, start_lon: float, end_lat: float, end_lon: float) -> Dict[str, Any]:
     """
     Public OSRM fallback (no key required).
@@ -66,7 +72,7 @@ def _route_osrm(start_lat: float, start_lon: float, end_lat: float, end_lon: flo
     url = f"https://router.project-osrm.org/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}"
     params = {"overview": "full", "alternatives": "false", "geometries": "geojson"}
     try:
-        r = requests.get(url, params=params, timeout=25)
+        r = requests.get(url, params=params, timeout=request_timeout(25))
         r.raise_for_status()
         js = r.json()
         if not js.get("routes"):
@@ -83,6 +89,7 @@ def _route_osrm(start_lat: float, start_lon: float, end_lat: float, end_lon: flo
         raise RuntimeError(f"OSRM routing failed: {e}")
 
 
+@shared_cache("route:ors", ttl=ROUTE_TTL_S)
 def _route_ors(start_lat: float, start_lon: float, end_lat: float, end_lon: float, api_key: str) -> Dict[str, Any]:
     """
     OpenRouteService (preferred). Requires ORS_API_KEY.
@@ -91,7 +98,7 @@ def _route_ors(start_lat: float, start_lon: float, end_lat: float, end_lon: floa
     headers = {"Authorization": api_key, "Content-Type": "application/json"}
     payload = {"coordinates": [[start_lon, start_lat], [end_lon, end_lat]]}
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=30)
+        r = requests.post(url, headers=headers, json=payload, timeout=request_timeout(30))
         r.raise_for_status()
         js = r.json()
         feat = js["features"][0]
@@ -107,11 +114,19 @@ def _route_ors(start_lat: float, start_lon: float, end_lat: float, end_lon: floa
 
 
 # ----------------- Public Helpers (used by orchestrator) -----------------
-def compute_route_features(query: str) -> Dict[str, Any]:
+def staging_and_hospital(lat: float, lon: float) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    """
+    Create a simple scenario: staging base to field hospital, offset from center.
+    """
+    return (lat - 0.15, lon - 0.15), (lat + 0.10, lon + 0.10)
+
+
+def compute_route_features(query: str, callbacks=None) -> Dict[str, Any]:
     """
     Returns a dict with:
       - 'summary': text (LLM plan)
       - 'features': [GeoJSON Feature, ...] for route + markers
+    `callbacks` (LangChain handlers) receive the plan's tokens as they are generated.
     """
     loc = _geocode(query)
     if not loc:
@@ -125,14 +140,17 @@ def compute_route_features(query: str) -> Dict[str, Any]:
         }
 
     lat, lon = loc
+    start, end = staging_and_hospital(lat, lon)
 
-    # Create a simple scenario: staging base to field hospital, offset from center.
-    start = (lat - 0.15, lon - 0.15)
-    end = (lat + 0.10, lon + 0.10)
-
-    # Try ORS, then OSRM
+    # Try ORS, then OSRM (hedged: OSRM also fires if ORS is slower than its p95)
     try:
-        if ORS_API_KEY and len(ORS_API_KEY.strip()) > 0:
+        if ORS_API_KEY and len(ORS_API_KEY.strip()) > 0 and HEDGE_ENABLED:
+            _, route = hedged_call(
+                lambda: _route_ors(start[0], start[1], end[0], end[1], ORS_API_KEY),
+                lambda: _route_osrm(start[0], start[1], end[0], end[1]),
+                ROUTE_HEDGE_DELAY_S,
+            )
+        elif ORS_API_KEY and len(ORS_API_KEY.strip()) > 0:
             try:
                 route = _route_ors(start[0], start[1], end[0], end[1], ORS_API_KEY)
             except Exception as ors_err:
@@ -184,7 +202,7 @@ def compute_route_features(query: str) -> Dict[str, Any]:
         "Give step-by-step logistics guidance: entry corridors, alternates, "
         "staging depots, ambulance lanes, bridge/overpass avoidance, and refuel/comms nodes."
     )
-    plan_text = llm.invoke(prompt).content
+    plan_text = llm.invoke(prompt, config={"callbacks": callbacks}).content
 
     return {
         "summary": plan_text,
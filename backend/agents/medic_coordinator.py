@@ -4,8 +4,13 @@ from langchain_openai import ChatOpenAI
 from geopy.geocoders import Nominatim
 # from .keys import ss, api_key, api_key_secret, access_token, access_token_secret
 import tweepy
-import re
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from agents.triage_classifier import triage_classifier
+from agents.state_backend import shared_cache, GEOCODE_TTL_S
+from orchestrator.stage_cache import normalize_scenario
 
 
 
@@ -35,7 +40,8 @@ llm = ChatOpenAI(
     model="gpt-5-chat-latest",
     api_key=AIML_API_KEY,
     base_url="https://api.aimlapi.com/v1",
-    temperature=0.2
+    temperature=0.2,
+    streaming=True,  # token callbacks for /simulate/stream
 )
 
 # --- Setup Twitter Tweepy Client ---
@@ -45,6 +51,7 @@ auth = tweepy.OAuth1UserHandler(
 )
 api = tweepy.API(auth, wait_on_rate_limit=True)
 
+@shared_cache("geocode", ttl=GEOCODE_TTL_S, decode=tuple, cache_none=False, key=normalize_scenario)
 def _geocode(place: str):
     geolocator = Nominatim(user_agent="swarm-aid")
     try:
@@ -55,6 +62,46 @@ def _geocode(place: str):
         return None
     return (loc.latitude, loc.longitude)
 
+# 🚑 Fallback dataset (used when the Twitter API is unavailable)
+FALLBACK_TWEETS = [
+    "Central hospitals overwhelmed with casualties.",
+    "Eastern districts need urgent trauma care and burn units.",
+    "Shortage of ambulances delaying medical response.",
+    "Rescue workers report crush injuries and fractures.",
+    "Children suffering shock and dehydration in shelters."
+]
+
+def fetch_tweets(query: str, count: int = 5):
+    """
+    Raw tweet texts for a query (raises if the API fails or returns nothing).
+    """
+    tweets = api.search_tweets(
+        q=query + " -filter:retweets AND -filter:replies",
+        lang="en",
+        count=count,
+        tweet_mode="extended"
+    )
+    texts = [tweet.full_text for tweet in tweets]
+    if not texts:
+        raise ValueError("No tweets found.")
+    return texts[:count]
+
+# Tweets the orchestrator already fetched for the current run (see use_tweets)
+_UNSET = object()
+_tweet_snapshot: ContextVar = ContextVar("tweet_snapshot", default=_UNSET)
+
+@contextmanager
+def use_tweets(tweets):
+    """
+    Within this block, analyze_tweets uses `tweets` (a list of texts, or the
+    exception the fetch raised) instead of searching Twitter again.
+    """
+    token = _tweet_snapshot.set(tweets)
+    try:
+        yield
+    finally:
+        _tweet_snapshot.reset(token)
+
 # --- Tweet Analyzer function ---
 def analyze_tweets(query: str) -> str:
     """
@@ -62,33 +109,18 @@ def analyze_tweets(query: str) -> str:
     Falls back to demo tweets if API fails.
     """
     try:
-        tweets = api.search_tweets(
-            q=query + " -filter:retweets AND -filter:replies",
-            lang="en",
-            count=5,
-            tweet_mode="extended"
-        )
-
-        texts = [tweet.full_text for tweet in tweets]
-        if not texts:
-            raise ValueError("No tweets found.")
-
-        joined = "\n".join(texts[:5])
+        snapshot = _tweet_snapshot.get()
+        texts = fetch_tweets(query) if snapshot is _UNSET else snapshot
+        if isinstance(texts, Exception):
+            raise texts
+        joined = "\n".join(texts)
         summary = llm.invoke(
             f"Summarize urgent medical needs based on these tweets:\n{joined}"
         )
         return summary.content
 
     except Exception as e:
-        # 🚑 Fallback dataset
-        fallback_tweets = [
-            "Central hospitals overwhelmed with casualties.",
-            "Eastern districts need urgent trauma care and burn units.",
-            "Shortage of ambulances delaying medical response.",
-            "Rescue workers report crush injuries and fractures.",
-            "Children suffering shock and dehydration in shelters."
-        ]
-        joined = "\n".join(fallback_tweets)
+        joined = "\n".join(FALLBACK_TWEETS)
         summary = llm.invoke(
             f"(Twitter API unavailable: {e}) Summarize urgent medical needs based on these sample tweets:\n{joined}"
         )
@@ -108,18 +140,10 @@ def compute_triage_features(scenario: str):
 
     # 1) Get text summary from social signals
     summary_text = analyze_tweets(f"{scenario} disaster medical injuries hospitals damage")
-    text_lower = summary_text.lower()
-
-    # 2) Heuristic tag → severity + label
-    buckets = []
-    if re.search(r"\bburn(s| units| care)?\b", text_lower):
-        buckets.append(("Triage: Burns", "severe", +0.03, +0.01))
-    if re.search(r"\b(crush|fracture|orthopedic)\b", text_lower):
-        buckets.append(("Triage: Ortho/Crush", "moderate", -0.04, +0.02))
-    if re.search(r"\b(dehydration|children|pediatric)\b", text_lower):
-        buckets.append(("Triage: Pediatric/Dehydration", "moderate", +0.02, -0.03))
-    if re.search(r"\b(overwhelmed|icu|casualties|mass casualty)\b", text_lower):
-        buckets.append(("Triage: Casualty Surge", "severe", -0.03, -0.02))
+
+    # 2) Single-pass classification → severity + label (see triage_classifier.py)
+    matches = triage_classifier.classify(summary_text)
+    buckets = [(m["name"], m["severity"], m["offset"][0], m["offset"][1]) for m in matches]
 
     # Default if nothing matched
     if not buckets:
@@ -144,7 +168,12 @@ def compute_triage_features(scenario: str):
         + ". Use these as intake/stabilization anchors; connect to Logistics routes."
     )
 
-    return {"features": features, "summary": map_summary, "source_summary": summary_text}
+    return {
+        "features": features,
+        "summary": map_summary,
+        "source_summary": summary_text,
+        "categories": {m["name"]: m["count"] for m in matches},
+    }
 
 # ---------------- Tools & Agent ----------------
 tools = [
@@ -0,0 +1,181 @@
+# agents/plan_audit.py
+from __future__ import annotations
+
+from collections import defaultdict
+from math import cos, radians, floor, hypot
+from typing import Dict, Any, List, Tuple, Optional
+
+# ----------------- Thresholds -----------------
+ZONE_BUFFER_KM = 2.0        # route closer than this to a damage zone is flagged
+HAZARD_BUFFER_KM = 10.0     # route closer than this to an EONET hazard is flagged
+ENDPOINT_TOLERANCE_KM = 2.0  # route must start/end this close to staging/hospital
+HOSPITAL_COVERAGE_KM = 30.0  # every damage zone should be this close to the field hospital
+MIN_SPEED_KMH, MAX_SPEED_KMH = 5.0, 110.0
+MAX_DETOUR_RATIO = 3.0
+
+Point = Tuple[float, float]  # local (x_km, y_km)
+
+
+# ----------------- Geometry -----------------
+class _Projection:
+    """
+    Equirectangular projection to km around a reference latitude.
+    Accurate enough at city scale (tens of km).
+    """
+
+    def __init__(self, ref_lat: float):
+        self.kx = 111.32 * cos(radians(ref_lat))
+        self.ky = 110.574
+
+    def __call__(self, lon: float, lat: float) -> Point:
+        return (lon * self.kx, lat * self.ky)
+
+
+def _point_segment_km(p: Point, a: Point, b: Point) -> float:
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    seg2 = dx * dx + dy * dy
+    t = 0.0 if seg2 == 0 else max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / seg2))
+    return hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy))
+
+
+class SegmentGrid:
+    """
+    Uniform grid index over line segments: a point query only looks at the
+    segments in the cells its search radius overlaps, instead of every segment.
+    """
+
+    def __init__(self, cell_km: float):
+        self.cell_km = cell_km
+        self.cells: Dict[Tuple[int, int], List[Tuple[Point, Point]]] = defaultdict(list)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (floor(x / self.cell_km), floor(y / self.cell_km))
+
+    def add_line(self, points: List[Point]) -> None:
+        for a, b in zip(points, points[1:]):
+            (x0, y0), (x1, y1) = self._cell(*a), self._cell(*b)
+            for cx in range(min(x0, x1), max(x0, x1) + 1):
+                for cy in range(min(y0, y1), max(y0, y1) + 1):
+                    self.cells[(cx, cy)].append((a, b))
+
+    def nearest_km(self, p: Point, radius_km: float) -> Optional[float]:
+        """
+        Distance to the closest segment within radius_km, else None.
+        """
+        cx0, cy0 = self._cell(p[0] - radius_km, p[1] - radius_km)
+        cx1, cy1 = self._cell(p[0] + radius_km, p[1] + radius_km)
+        best = None
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for a, b in self.cells.get((cx, cy), ()):
+                    d = _point_segment_km(p, a, b)
+                    if d <= radius_km and (best is None or d < best):
+                        best = d
+        return best
+
+
+# ----------------- Audit -----------------
+def _finding(level: str, check: str, message: str) -> Dict[str, str]:
+    return {"level": level, "check": check, "message": message}
+
+
+def audit_plan(features: List[Dict[str, Any]], hazards: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, str]]:
+    """
+    Rule-based audit of a plan's GeoJSON (as built by generate_geojson) against
+    damage zones and nearby EONET hazards ({"title", "lat", "lon", ...}).
+    Returns findings: [{"level": "critical"|"warning"|"ok", "check", "message"}, ...]
+    """
+    findings: List[Dict[str, str]] = []
+
+    routes, zones, points = [], [], {}
+    for f in features:
+        geom = f.get("geometry") or {}
+        props = f.get("properties") or {}
+        if geom.get("type") == "LineString" and len(geom.get("coordinates") or []) >= 2:
+            routes.append(f)
+        elif geom.get("type") == "Point":
+            if props.get("type") == "damage":
+                zones.append(f)
+            elif props.get("name"):
+                points[props["name"]] = geom["coordinates"]
+
+    if not routes:
+        findings.append(_finding("critical", "route", "No routable corridor in the plan; only interim text guidance exists."))
+        return findings
+
+    ref_lat = routes[0]["geometry"]["coordinates"][0][1]
+    proj = _Projection(ref_lat)
+    grid = SegmentGrid(cell_km=max(ZONE_BUFFER_KM, HAZARD_BUFFER_KM))
+    for r in routes:
+        grid.add_line([proj(lon, lat) for lon, lat, *_ in r["geometry"]["coordinates"]])
+
+    # 1) Damage-zone proximity
+    for z in zones:
+        d = grid.nearest_km(proj(*z["geometry"]["coordinates"][:2]), ZONE_BUFFER_KM)
+        if d is not None:
+            sev = z["properties"].get("severity", "")
+            findings.append(_finding(
+                "critical" if sev == "severe" else "warning", "damage_zone",
+                f"Route passes {d:.1f} km from {z['properties'].get('name', 'damage zone')} ({sev}).",
+            ))
+
+    # 2) Hazard proximity
+    for h in hazards or []:
+        if h.get("lat") is None or h.get("lon") is None:
+            continue
+        d = grid.nearest_km(proj(h["lon"], h["lat"]), HAZARD_BUFFER_KM)
+        if d is not None:
+            findings.append(_finding(
+                "warning", "hazard",
+                f"Route passes {d:.1f} km from active hazard '{h.get('title', 'Event')}' ({h.get('category', '')}).",
+            ))
+
+    # 3) Distance / duration sanity
+    for r in routes:
+        props = r.get("properties") or {}
+        name = props.get("name", "route")
+        coords = r["geometry"]["coordinates"]
+        dist, dur = props.get("distance_km"), props.get("duration_min")
+        if dist and dur:
+            speed = dist / (dur / 60.0)
+            if not MIN_SPEED_KMH <= speed <= MAX_SPEED_KMH:
+                findings.append(_finding(
+                    "warning", "timing",
+                    f"{name}: implied average speed {speed:.0f} km/h ({dist} km in {dur} min) is implausible.",
+                ))
+        if dist:
+            straight = hypot(*(a - b for a, b in zip(proj(*coords[0][:2]), proj(*coords[-1][:2]))))
+            if straight > 0 and dist / straight > MAX_DETOUR_RATIO:
+                findings.append(_finding(
+                    "warning", "detour",
+                    f"{name}: road distance {dist} km is {dist / straight:.1f}x the straight line; check for a closure-driven detour.",
+                ))
+
+    # 4) Staging → hospital coverage
+    staging, hospital = points.get("Staging Base"), points.get("Field Hospital")
+    if not staging or not hospital:
+        findings.append(_finding("critical", "coverage", "Plan lacks a staging base or field hospital marker."))
+    else:
+        for label, target in (("staging base", staging), ("field hospital", hospital)):
+            if grid.nearest_km(proj(*target[:2]), ENDPOINT_TOLERANCE_KM) is None:
+                findings.append(_finding(
+                    "critical", "coverage",
+                    f"No route reaches the {label} (nothing within {ENDPOINT_TOLERANCE_KM:g} km).",
+                ))
+        hx, hy = proj(*hospital[:2])
+        for z in zones:
+            zx, zy = proj(*z["geometry"]["coordinates"][:2])
+            d = hypot(zx - hx, zy - hy)
+            if d > HOSPITAL_COVERAGE_KM:
+                findings.append(_finding(
+                    "warning", "coverage",
+                    f"{z['properties'].get('name', 'Damage zone')} is {d:.0f} km from the field hospital.",
+                ))
+
+    if not findings:
+        findings.append(_finding("ok", "all", "No geometric issues found."))
+    return findings
+
+
+def format_findings(findings: List[Dict[str, str]]) -> str:
+    return "\n".join(f"- [{f['level'].upper()}] {f['check']}: {f['message']}" for f in findings)
@@ -0,0 +1,358 @@
+# agents/region_packs.py
+"""
+Prewarmed region packs for frequently simulated scenarios.
+
+Build (CLI, from backend/):
+  python -m agents.region_packs build --scenarios "Tokyo earthquake,Lahore flood"
+or POST /admin/region-packs/build. Scenarios default to REGION_PACK_SCENARIOS.
+
+Each pack stores the geocode, the local drivable road graph (osmnx), a
+baseline route matrix between the incident center, staging base and field
+hospital, and the nearby hazard index. At startup the backend seeds the
+geocode/route caches from the packs. Pack scenarios read hazards from their own
+index while it is younger than REGION_PACK_HAZARD_MAX_AGE_S; other scenarios
+always use the live EONET feed. Requests for pack scenarios then only go to the
+network for the LLM (and live tweets).
+
+The request path only reads meta.json. The road graph and route matrix arrays
+are stored (and memory-mapped, so they cost nothing until touched) for offline
+analysis and tools; nothing in /simulate reads them yet.
+
+Every worker re-checks the pack files' mtimes (at most every
+REGION_PACK_RECHECK_S), so a rebuild triggered on one worker reaches them all.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from agents.state_backend import get_json, set_json
+from orchestrator.stage_cache import normalize_scenario
+from agents.logistics_manager import _geocode, _route_osrm, _route_ors, staging_and_hospital, ORS_API_KEY
+from agents.data_analyst import _fetch_eonet_events, nearby_hazards
+
+# ----------------- Config -----------------
+REGION_PACKS_DIR = os.getenv(
+    "REGION_PACKS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "region_packs")
+)
+REGION_PACK_SCENARIOS = [s.strip() for s in os.getenv("REGION_PACK_SCENARIOS", "").split(",") if s.strip()]
+ROAD_GRAPH_RADIUS_M = int(os.getenv("ROAD_GRAPH_RADIUS_M", "10000"))
+# Older pack hazard indexes are ignored and the live EONET feed is used instead
+REGION_PACK_HAZARD_MAX_AGE_S = float(os.getenv("REGION_PACK_HAZARD_MAX_AGE_S", "3600"))
+# How often each worker checks the pack directory for rebuilt packs
+REGION_PACK_RECHECK_S = float(os.getenv("REGION_PACK_RECHECK_S", "10"))
+# A build still marked running after this long is assumed dead (e.g. its worker restarted)
+REGION_PACK_BUILD_TIMEOUT_S = float(os.getenv("REGION_PACK_BUILD_TIMEOUT_S", "3600"))
+
+# Loaded packs by normalized scenario: {"meta": {...}, "route_matrix": mmap, "graph_nodes": mmap, "graph_edges": mmap}
+loaded_packs: Dict[str, Dict[str, Any]] = {}
+
+
+def _slug(scenario: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", normalize_scenario(scenario)).strip("-") or "region"
+
+
+def _replace_file(path: str, write) -> None:
+    """
+    Write via a temp file + rename, so other workers never read (or mmap) a
+    half-written file.
+    """
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as fh:
+        write(fh)
+    os.replace(tmp, path)
+
+
+# ----------------- Build -----------------
+def _route_fresh(start, end) -> Optional[Dict[str, Any]]:
+    """
+    Route bypassing the cache (packs must hold fresh data); ORS first if configured.
+    """
+    if ORS_API_KEY and ORS_API_KEY.strip():
+        try:
+            return _route_ors.__wrapped__(start[0], start[1], end[0], end[1], ORS_API_KEY)
+        except Exception:
+            pass
+    try:
+        return _route_osrm.__wrapped__(start[0], start[1], end[0], end[1])
+    except Exception as e:
+        print(f"⚠️ Region pack routing failed {start} → {end}: {e}")
+        return None
+
+
+def _road_graph(lat: float, lon: float):
+    """
+    Drivable road graph around (lat, lon) as arrays:
+      nodes (N, 3) float64 [osmid, lat, lon]; edges (M, 3) float64 [u_idx, v_idx, length_m]
+    Returns (None, None) if osmnx is unavailable or the download fails.
+    """
+    try:
+        import osmnx as ox
+
+        G = ox.graph_from_point((lat, lon), dist=ROAD_GRAPH_RADIUS_M, network_type="drive")
+    except Exception as e:
+        print(f"⚠️ Road graph unavailable for ({lat:.4f}, {lon:.4f}): {e}")
+        return None, None
+
+    index = {}
+    nodes = np.empty((G.number_of_nodes(), 3), dtype=np.float64)
+    for i, (osmid, data) in enumerate(G.nodes(data=True)):
+        index[osmid] = i
+        nodes[i] = (osmid, data["y"], data["x"])
+    edges = np.array(
+        [(index[u], index[v], data.get("length", 0.0)) for u, v, data in G.edges(data=True)],
+        dtype=np.float64,
+    ).reshape(-1, 3)
+    return nodes, edges
+
+
+def build_region_pack(scenario: str, events: Optional[List[Dict[str, Any]]], out_dir: str) -> Dict[str, Any]:
+    loc = _geocode.__wrapped__(scenario)
+    if not loc:
+        return {"scenario": scenario, "ok": False, "error": "could not geocode"}
+
+    lat, lon = loc
+    start, end = staging_and_hospital(lat, lon)
+    points = {"center": (lat, lon), "staging": start, "hospital": end}
+    labels = list(points)
+
+    # Baseline route matrix: [from, to, (distance_km, duration_min)], NaN where unroutable
+    matrix = np.full((len(labels), len(labels), 2), np.nan, dtype=np.float32)
+    routes = {}
+    for i, a in enumerate(labels):
+        for j, b in enumerate(labels):
+            if i == j:
+                matrix[i, j] = 0.0
+                continue
+            route = _route_fresh(points[a], points[b])
+            if route:
+                matrix[i, j] = (route["distance_km"], route["duration_min"])
+                routes[f"{a}->{b}"] = route
+
+    nodes, edges = _road_graph(lat, lon)
+
+    pack_dir = os.path.join(out_dir, _slug(scenario))
+    os.makedirs(pack_dir, exist_ok=True)
+    _replace_file(os.path.join(pack_dir, "route_matrix.npy"), lambda fh: np.save(fh, matrix))
+    if nodes is not None:
+        _replace_file(os.path.join(pack_dir, "graph_nodes.npy"), lambda fh: np.save(fh, nodes))
+        _replace_file(os.path.join(pack_dir, "graph_edges.npy"), lambda fh: np.save(fh, edges))
+
+    meta = {
+        "scenario": scenario,
+        "built_at": time.time(),
+        "location": [lat, lon],
+        "points": {k: list(v) for k, v in points.items()},
+        "labels": labels,
+        "routes": routes,
+        # Raw EONET events near this region, so the agent tool can consume them as-is
+        "hazard_events": (
+            [ev for ev in events if nearby_hazards(lat, lon, [ev])] if events is not None else None
+        ),
+        "hazards_at": time.time() if events is not None else None,
+        "ors": bool(ORS_API_KEY and ORS_API_KEY.strip()),
+    }
+    # meta.json last: its mtime tells other workers the pack changed
+    _replace_file(os.path.join(pack_dir, "meta.json"), lambda fh: fh.write(json.dumps(meta).encode("utf-8")))
+
+    return {
+        "scenario": scenario,
+        "ok": True,
+        "routes": len(routes),
+        "graph_nodes": 0 if nodes is None else len(nodes),
+        "hazards": len(meta["hazard_events"] or []),
+    }
+
+
+def build_region_packs(scenarios: Optional[List[str]] = None, out_dir: Optional[str] = None) -> Dict[str, Any]:
+    scenarios = scenarios or REGION_PACK_SCENARIOS
+    out_dir = out_dir or REGION_PACKS_DIR
+    os.makedirs(out_dir, exist_ok=True)
+
+    # One EONET fetch, filtered per region
+    try:
+        events = _fetch_eonet_events.__wrapped__()
+    except Exception as e:
+        print(f"⚠️ EONET snapshot failed: {e}")
+        events = None
+
+    return {"dir": out_dir, "packs": [build_region_pack(s, events, out_dir) for s in scenarios]}
+
+
+# ----------------- Load -----------------
+def _load_npy(path: str):
+    return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+
+def _pack_signature(pack_dir: str):
+    sig = []
+    for name in sorted(os.listdir(pack_dir)):
+        try:
+            sig.append((name, os.stat(os.path.join(pack_dir, name, "meta.json")).st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(sig)
+
+
+_load_lock = threading.Lock()
+_loaded_signature = None
+_checked_at = 0.0
+
+
+def load_region_packs(pack_dir: Optional[str] = None) -> List[str]:
+    """
+    Memory-map every pack in pack_dir and seed the geocode/route caches from it.
+    Seeded entries do not expire; rebuilding the packs refreshes them.
+    Hazards are not seeded: see pack_hazard_events.
+    """
+    global _loaded_signature, _checked_at
+    pack_dir = pack_dir or REGION_PACKS_DIR
+    if not os.path.isdir(pack_dir):
+        return []
+
+    with _load_lock:
+        signature = _pack_signature(pack_dir)
+        packs, loaded = {}, []
+        for name, _ in signature:
+            meta_path = os.path.join(pack_dir, name, "meta.json")
+            try:
+                with open(meta_path, "r", encoding="utf-8") as fh:
+                    meta = json.load(fh)
+            except Exception as e:
+                print(f"⚠️ Skipping region pack {name}: {e}")
+                continue
+
+            scenario = meta["scenario"]
+            # _geocode keys by the normalized scenario, so any spelling of it hits the pack
+            _geocode.prime(meta["location"], scenario)
+
+            # Seed the exact calls compute_route_features makes (staging → hospital)
+            route = meta["routes"].get("staging->hospital")
+            if route:
+                (s_lat, s_lon), (e_lat, e_lon) = meta["points"]["staging"], meta["points"]["hospital"]
+                # Whichever engine this server tries (ORS, hedged OSRM or OSRM alone) hits the pack
+                _route_osrm.prime(route, s_lat, s_lon, e_lat, e_lon)
+                if ORS_API_KEY and ORS_API_KEY.strip():
+                    _route_ors.prime(route, s_lat, s_lon, e_lat, e_lon, ORS_API_KEY)
+
+            packs[normalize_scenario(scenario)] = {
+                "meta": meta,
+                "route_matrix": _load_npy(os.path.join(pack_dir, name, "route_matrix.npy")),
+                "graph_nodes": _load_npy(os.path.join(pack_dir, name, "graph_nodes.npy")),
+                "graph_edges": _load_npy(os.path.join(pack_dir, name, "graph_edges.npy")),
+            }
+            loaded.append(scenario)
+
+        # Update in place (main.py holds a reference); never empty in between
+        for key in set(loaded_packs) - set(packs):
+            loaded_packs.pop(key, None)
+        loaded_packs.update(packs)
+        _loaded_signature, _checked_at = signature, time.time()
+    return loaded
+
+
+def refresh_region_packs(force: bool = False) -> bool:
+    """
+    Reload the packs if any meta.json changed on disk since this worker last
+    loaded them (e.g. another worker rebuilt them). Checks at most every
+    REGION_PACK_RECHECK_S unless force=True. Returns True if it reloaded.
+    """
+    global _checked_at
+    if not force and time.time() - _checked_at < REGION_PACK_RECHECK_S:
+        return False
+    if not os.path.isdir(REGION_PACKS_DIR):
+        return False
+    if _pack_signature(REGION_PACKS_DIR) == _loaded_signature:
+        _checked_at = time.time()
+        return False
+    load_region_packs()
+    return True
+
+
+def get_region_pack(scenario: str) -> Optional[Dict[str, Any]]:
+    refresh_region_packs()
+    return loaded_packs.get(normalize_scenario(scenario))
+
+
+def pack_hazard_events(scenario: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    The pack's EONET events for this scenario, or None if there is no pack or
+    its hazard index is older than REGION_PACK_HAZARD_MAX_AGE_S.
+    """
+    pack = get_region_pack(scenario)
+    if not pack:
+        return None
+    meta = pack["meta"]
+    if meta.get("hazard_events") is None or not meta.get("hazards_at"):
+        return None
+    if time.time() - meta["hazards_at"] > REGION_PACK_HAZARD_MAX_AGE_S:
+        return None
+    return meta["hazard_events"]
+
+
+# ----------------- Background builds (admin endpoint) -----------------
+# Status lives in the shared state backend, so every worker reports (and
+# respects) a build started on any of them
+_BUILD_STATUS_KEY = "region-packs:build"
+_build_lock = threading.Lock()
+
+
+def get_build_status() -> Dict[str, Any]:
+    hit, status = get_json(_BUILD_STATUS_KEY)
+    return status if hit and status else {"running": False, "started_at": None, "last_result": None}
+
+
+def start_background_build(scenarios: Optional[List[str]] = None) -> bool:
+    """
+    Build and reload packs in a background thread.
+    Returns False if a build is already running (on any worker).
+    """
+    if not _build_lock.acquire(blocking=False):
+        return False
+    status = get_build_status()
+    if status["running"]:
+        _build_lock.release()
+        return False
+    # Expires on its own if this worker dies mid-build
+    set_json(
+        _BUILD_STATUS_KEY,
+        {**status, "running": True, "started_at": time.time(), "pid": os.getpid()},
+        ttl=REGION_PACK_BUILD_TIMEOUT_S,
+    )
+
+    def worker():
+        try:
+            result = build_region_packs(scenarios)
+            result["loaded"] = load_region_packs()
+        except Exception as e:
+            result = {"error": str(e)}
+        set_json(_BUILD_STATUS_KEY, {**get_build_status(), "running": False, "last_result": result})
+        _build_lock.release()
+
+    threading.Thread(target=worker, name="region-pack-build", daemon=True).start()
+    return True
+
+
+# ----------------- CLI -----------------
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Build prewarmed region packs")
+    p.add_argument("command", choices=["build"])
+    p.add_argument("--scenarios", help="Comma-separated scenarios (default: REGION_PACK_SCENARIOS)")
+    p.add_argument("--out", help=f"Output directory (default: {REGION_PACKS_DIR})")
+    args = p.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()] if args.scenarios else None
+    if not (scenarios or REGION_PACK_SCENARIOS):
+        p.error("no scenarios: pass --scenarios or set REGION_PACK_SCENARIOS")
+    print(json.dumps(build_region_packs(scenarios, args.out), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# agents/state_backend.py
+"""
+Shared cache/state backend used by every cache in the backend.
+
+Pick one with SWARM_STATE_BACKEND:
+  - "memory" (default)            per-process dict, same as the old lru_cache
+  - "sqlite" or "sqlite:///path"  one file shared by all workers on a host
+  - "redis://host:6379/0"         shared across hosts (needs the `redis` package)
+
+Multi-worker example:
+  SWARM_STATE_BACKEND=sqlite uvicorn main:app --workers 4
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+from time import time
+from typing import Any, Callable, Optional
+
+
+class MemoryBackend:
+    """
+    In-process store (bounded LRU). Not shared between workers.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteBackend:
+    """
+    File-backed store shared by all worker processes on one host (WAL mode).
+    Every `sweep_every` writes (per process) expired rows are deleted and the
+    table is trimmed to the `max_entries` most recently written rows, since
+    keys derive from user-supplied scenarios and would otherwise grow forever.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, sweep_every: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        if expires is not None and expires < time():
+            conn.execute("DELETE FROM kv WHERE key = ? AND expires = ?", (key, expires))
+            conn.commit()
+            return None
+        return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, time() + ttl if ttl else None),
+        )
+        conn.commit()
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.sweep_every == 0
+        if due:
+            self.sweep()
+
+    def sweep(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires < ?", (time(),))
+        # INSERT OR REPLACE gives a rewritten key a new rowid, so rowid order is write order
+        conn.execute(
+            "DELETE FROM kv WHERE rowid IN (SELECT rowid FROM kv ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+    def delete(self, key: str) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        conn.commit()
+
+
+class RedisBackend:
+    """
+    Redis (or any client with Redis-compatible get/set/delete, e.g. fakeredis
+    for local testing: RedisBackend(client=fakeredis.FakeRedis())).
+    """
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "swarm-aid:"):
+        if client is None:
+            import redis  # optional dependency
+
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        # Milliseconds: ex=int(ttl) would round sub-second TTLs to 0, which Redis rejects
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+def make_backend(spec: Optional[str] = None):
+    """
+    Build a backend from a spec string (see module docstring).
+    """
+    spec = (spec or os.getenv("SWARM_STATE_BACKEND") or "memory").strip()
+    if spec == "memory":
+        return MemoryBackend()
+    if spec == "sqlite":
+        return SQLiteBackend(os.path.join(tempfile.gettempdir(), "swarm-aid-state.sqlite3"))
+    if spec.startswith("sqlite:///"):
+        return SQLiteBackend(spec[len("sqlite:///"):])
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url=spec)
+    raise ValueError(f"Unknown SWARM_STATE_BACKEND: {spec!r}")
+
+
+# Cache lifetimes (seconds)
+GEOCODE_TTL_S = float(os.getenv("GEOCODE_TTL_S", str(7 * 24 * 3600)))
+ROUTE_TTL_S = float(os.getenv("ROUTE_TTL_S", "3600"))
+HAZARD_TTL_S = float(os.getenv("HAZARD_TTL_S", "300"))
+STAGE_TTL_S = float(os.getenv("STAGE_TTL_S", str(24 * 3600)))
+
+# ✅ Process-wide backend (shared across workers unless it is "memory")
+state = make_backend()
+
+
+def cache_key(namespace: str, *parts: Any) -> str:
+    blob = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return f"{namespace}:{hashlib.sha256(blob.encode('utf-8')).hexdigest()[:24]}"
+
+
+def get_json(key: str) -> tuple:
+    """
+    Returns (hit, value). Backend errors and undecodable entries count as a miss.
+    """
+    try:
+        raw = state.get(key)
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+    except Exception as e:
+        print(f"⚠️ State backend read failed ({key}): {e}")
+        return False, None
+
+
+def set_json(key: str, value: Any, ttl: Optional[float] = None) -> None:
+    try:
+        state.set(key, json.dumps(value, default=str, ensure_ascii=False), ttl)
+    except Exception as e:
+        print(f"⚠️ State backend write failed ({key}): {e}")
+
+
+def shared_cache(
+    namespace: str,
+    ttl: Optional[float] = None,
+    decode: Optional[Callable[[Any], Any]] = None,
+    cache_none: bool = True,
+    key: Optional[Callable[..., Any]] = None,
+):
+    """
+    Drop-in replacement for functools.lru_cache backed by the shared state.
+    Results must be JSON-serializable; `decode` restores non-JSON types
+    (e.g. tuple) on a hit. Exceptions are not cached, and neither is None
+    when cache_none=False (for lookups that return None on transient errors).
+    `key(*args, **kwargs)`, if given, replaces the arguments in the cache key
+    (e.g. to normalize place names so equivalent spellings share an entry).
+    """
+
+    def decorator(func):
+        def make_key(*args, **kwargs):
+            return cache_key(namespace, key(*args, **kwargs)) if key else cache_key(namespace, args, kwargs)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            hit, value = get_json(make_key(*args, **kwargs))
+            if hit:
+                return decode(value) if decode and value is not None else value
+            value = func(*args, **kwargs)
+            if value is not None or cache_none:
+                set_json(make_key(*args, **kwargs), value, ttl)
+            return value
+
+        wrapper.cache_key = make_key
+        # Seed a result without calling func (e.g. from a prebuilt region pack)
+        wrapper.prime = lambda value, *args, ttl=None, **kwargs: set_json(make_key(*args, **kwargs), value, ttl)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,328 @@
+# loadtest.py
+"""
+Load-test harness for the FastAPI app.
+
+In-process (default): starts main:app on a local uvicorn server with stubbed
+upstreams (geocoder, EONET, Twitter, routing, LLM agents) and drives /simulate.
+Against a running server: pass --url http://127.0.0.1:8000.
+
+Examples:
+  python loadtest.py --concurrency 32 --requests 500
+  python loadtest.py --rate 20 --duration 30 --llm-quota 8 --profile hot.folded
+  python loadtest.py --url http://127.0.0.1:8000 --concurrency 8 --requests 50
+
+--profile writes collapsed stacks ("frame;frame;frame count"), the input format
+of flamegraph.pl and speedscope.
+
+Concurrent requests for the same scenario share one execution (single-flight),
+so cycling a few scenarios mostly measures shared runs. --unique-scenarios
+makes every request's scenario distinct to measure the cost of each run; the
+report's "coalescing" block (from /metrics) shows how many were shared.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+from typing import Any, Dict, List, Optional
+
+
+# ----------------- Stubbed upstreams -----------------
+class _StubAgent:
+    def __init__(self, name: str, latency_s: float, quota: Optional[threading.BoundedSemaphore]):
+        self.name = name
+        self.latency_s = latency_s
+        self.quota = quota
+
+    def run(self, prompt: str, **kwargs) -> str:
+        if self.quota:
+            with self.quota:
+                sleep(self.latency_s)
+        else:
+            sleep(self.latency_s)
+        return f"({self.name} stub) {prompt[:80]}"
+
+
+def install_stubs(llm_latency_s: float, upstream_latency_s: float, llm_quota: int = 0, reuse_stages: bool = False):
+    """
+    Replace every network-bound call the orchestrator makes with a sleep of the
+    configured latency, so the app can be loaded without touching real upstreams.
+    """
+    os.environ.setdefault("ss", "loadtest-dummy-key")  # agents build ChatOpenAI at import
+    import orchestrator.orchestrator as orch
+    from orchestrator.stage_cache import StageCache
+
+    quota = threading.BoundedSemaphore(llm_quota) if llm_quota > 0 else None
+    counter = iter(range(10**12))
+
+    def geocode(place):
+        sleep(upstream_latency_s)
+        rnd = random.Random(place)
+        return (rnd.uniform(-60, 60), rnd.uniform(-180, 180))
+
+    def hazard_events():
+        sleep(upstream_latency_s)
+        return []
+
+    def tweets(query, count=5):
+        sleep(upstream_latency_s)
+        # Unique per call so the social stage (and downstream agents) recompute
+        return [f"stub tweet {next(counter)} about {query}"]
+
+    def route_features(query, **kwargs):
+        sleep(upstream_latency_s)
+        _StubAgent("route plan", llm_latency_s, quota).run(query)
+        return {"summary": f"(route stub) {query}", "features": []}
+
+    orch._geocode = geocode
+    orch.fetch_hazard_events = hazard_events
+    orch.fetch_tweets = tweets
+    orch.compute_route_features = route_features
+    orch.data_analyst = _StubAgent("Data Analyst", llm_latency_s, quota)
+    orch.medic_coordinator = _StubAgent("Medic Coordinator", llm_latency_s, quota)
+    orch.logistics_manager = _StubAgent("Logistics Manager", llm_latency_s, quota)
+    critic = _StubAgent("Critic", llm_latency_s, quota)
+    orch.critique_findings = lambda scenario, findings, plan_excerpt="", **kwargs: critic.run(scenario)
+
+    if not reuse_stages:
+        class _ColdStageCache(StageCache):
+            def lookup(self, scope, stage, fp):
+                return False, None
+
+        orch.stage_cache = _ColdStageCache()
+
+
+def start_local_server(port: int = 0):
+    """
+    Serve main:app on 127.0.0.1 in a background thread. Returns (base_url, server).
+    """
+    import uvicorn
+    from main import app
+
+    if not port:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="loadtest-server", daemon=True)
+    thread.start()
+    while not server.started:
+        sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+# ----------------- Sampling profiler -----------------
+class StackSampler:
+    """
+    Samples the Python stacks of all threads (except the load generator's
+    client and sampler threads) every `interval_s` and aggregates them as
+    collapsed stacks. The in-process server's event-loop thread is sampled.
+    """
+
+    def __init__(self, interval_s: float = 0.005, exclude_prefixes=("loadtest-client", "loadtest-sampler")):
+        self.interval_s = interval_s
+        self.exclude_prefixes = exclude_prefixes
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="loadtest-sampler", daemon=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if names.get(ident, "").startswith(self.exclude_prefixes):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            sleep(self.interval_s)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+# ----------------- Load generator -----------------
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def _coalescing_metrics(base_url: str, timeout_s: float) -> Optional[Dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=timeout_s) as resp:
+            return json.loads(resp.read())["simulate_coalescing"]
+    except Exception:
+        return None  # server without /metrics
+
+
+def _coalescing_delta(before, after) -> Optional[Dict[str, Any]]:
+    """
+    Single-flight counters for this run only. /metrics is per worker process,
+    so with several workers this covers whichever one answered.
+    """
+    if not before or not after:
+        return None
+    delta = {k: after[k] - before[k] for k in ("requests", "executions", "coalesced")}
+    delta["coalescing_ratio"] = round(delta["coalesced"] / delta["requests"], 4) if delta["requests"] else 0.0
+    return delta
+
+
+def run_load(
+    base_url: str,
+    scenarios: List[str],
+    concurrency: int,
+    requests: int = 0,
+    rate: float = 0.0,
+    duration_s: float = 0.0,
+    timeout_s: float = 120.0,
+    unique_scenarios: bool = False,
+) -> Dict[str, Any]:
+    """
+    Closed loop (`requests` total, `concurrency` in flight) or, when `rate` is
+    set, open loop with Poisson arrivals for `duration_s` (capped at
+    `concurrency` in flight; arrivals beyond that queue client-side and the
+    queueing time is included in their latency).
+    With unique_scenarios, request i sends "<scenario> #i" so no two requests
+    coalesce.
+    """
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    lock = threading.Lock()
+    metrics_before = _coalescing_metrics(base_url, timeout_s)
+
+    def one(i: int, scheduled_at: Optional[float] = None):
+        scenario = scenarios[i % len(scenarios)]
+        if unique_scenarios:
+            scenario = f"{scenario} #{i}"
+        url = f"{base_url}/simulate?" + urllib.parse.urlencode({"scenario": scenario})
+        # Open loop: measure from the scheduled arrival, so time spent queued
+        # client-side counts (avoids coordinated omission)
+        t0 = scheduled_at if scheduled_at is not None else perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=timeout_s) as resp:
+                resp.read()
+            ok = True
+        except Exception as e:
+            ok = False
+            kind = f"HTTP {e.code}" if hasattr(e, "code") else type(e).__name__
+        elapsed = perf_counter() - t0
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors[kind] += 1
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadtest-client") as pool:
+        if rate > 0:
+            i = 0
+            next_at = started
+            while perf_counter() - started < duration_s:
+                pool.submit(one, i, next_at)
+                i += 1
+                next_at += random.expovariate(rate)
+                sleep(max(0.0, next_at - perf_counter()))
+            sent = i
+        else:
+            for i in range(requests):
+                pool.submit(one, i)
+            sent = requests
+    wall_s = perf_counter() - started
+
+    lat = sorted(latencies)
+    done = len(lat) + sum(errors.values())
+    ms = lambda v: round(v * 1000, 1) if v is not None else None
+    return {
+        "sent": sent,
+        "ok": len(lat),
+        "errors": dict(errors),
+        "error_rate": round(sum(errors.values()) / done, 4) if done else 0.0,
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round(len(lat) / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": {
+            "p50": ms(_percentile(lat, 50)),
+            "p95": ms(_percentile(lat, 95)),
+            "p99": ms(_percentile(lat, 99)),
+            "max": ms(lat[-1] if lat else None),
+        },
+        "coalescing": _coalescing_delta(metrics_before, _coalescing_metrics(base_url, timeout_s)),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Load-test /simulate")
+    p.add_argument("--url", help="Target a running server instead of an in-process one")
+    p.add_argument("--scenarios", default="Tokyo earthquake,Lahore flood,Istanbul earthquake",
+                   help="Comma-separated scenarios, cycled across requests")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--requests", type=int, default=200, help="Closed-loop total requests")
+    p.add_argument("--rate", type=float, default=0.0, help="Open-loop arrivals per second")
+    p.add_argument("--duration", type=float, default=30.0, help="Open-loop duration (s)")
+    p.add_argument("--llm-latency", type=float, default=0.2, help="Stub latency per LLM/agent call (s)")
+    p.add_argument("--upstream-latency", type=float, default=0.05, help="Stub latency per HTTP upstream (s)")
+    p.add_argument("--llm-quota", type=int, default=0, help="Max concurrent stub LLM calls (0 = unlimited)")
+    p.add_argument("--reuse-stages", action="store_true", help="Let the stage cache reuse outputs between requests")
+    p.add_argument("--unique-scenarios", action="store_true",
+                   help="Make every request's scenario distinct so none are coalesced")
+    p.add_argument("--profile", help="Write collapsed stacks of the server to this file")
+    args = p.parse_args(argv)
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        install_stubs(args.llm_latency, args.upstream_latency, args.llm_quota, args.reuse_stages)
+        base_url, server = start_local_server()
+
+    sampler = StackSampler().start() if args.profile and server else None
+    if args.profile and not server:
+        print("⚠️ --profile samples the in-process server only; ignored with --url")
+
+    report = run_load(
+        base_url,
+        [s.strip() for s in args.scenarios.split(",") if s.strip()],
+        concurrency=args.concurrency,
+        requests=args.requests,
+        rate=args.rate,
+        duration_s=args.duration,
+        unique_scenarios=args.unique_scenarios,
+    )
+
+    if sampler:
+        sampler.stop()
+        sampler.write_collapsed(args.profile)
+        report["profile"] = {"path": args.profile, "samples": sum(sampler.stacks.values())}
+    if server:
+        server.should_exit = True
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
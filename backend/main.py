@@ -1,6 +1,18 @@
-from fastapi import FastAPI
+from typing import Optional
+import os
+import secrets
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from orchestrator.orchestrator import run_simulation
+from fastapi.responses import StreamingResponse
+from orchestrator.orchestrator import run_simulation, simulation_flight
+from orchestrator.streaming import stream_simulation
+from agents.region_packs import (
+    load_region_packs, refresh_region_packs, loaded_packs, start_background_build, get_build_status, REGION_PACK_SCENARIOS,
+)
+
+# Admin endpoints are disabled unless this is set (send as X-Admin-Token)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 app = FastAPI()
 app.add_middleware(
@@ -19,3 +31,58 @@ def root():
 def simulate_crisis(scenario: str = "Tokyo earthquake"):
     result = run_simulation(scenario)
     return result
+
+@app.get("/metrics")
+def metrics():
+    # Per worker process: request coalescing for /simulate
+    return {"simulate_coalescing": simulation_flight.metrics()}
+
+@app.get("/simulate/stream")
+def simulate_crisis_stream(scenario: str = "Tokyo earthquake"):
+    # NDJSON: token events per agent as they are generated, then the full result
+    return StreamingResponse(stream_simulation(scenario, run_simulation), media_type="application/x-ndjson")
+
+
+@app.on_event("startup")
+def warm_region_packs():
+    loaded = load_region_packs()
+    if loaded:
+        print(f"✅ Region packs loaded: {', '.join(loaded)}")
+
+
+def _check_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not secrets.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/region-packs/build", status_code=202)
+def build_packs(scenarios: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    names = [s.strip() for s in scenarios.split(",") if s.strip()] if scenarios else None
+    if not (names or REGION_PACK_SCENARIOS):
+        raise HTTPException(status_code=400, detail="No scenarios: pass ?scenarios= or set REGION_PACK_SCENARIOS")
+    # Builds download road graphs and routes; run them off the request path
+    if not start_background_build(names):
+        raise HTTPException(status_code=409, detail="A region-pack build is already running")
+    return {"status": "started", "scenarios": names or REGION_PACK_SCENARIOS}
+
+
+@app.get("/admin/region-packs")
+def list_packs(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    refresh_region_packs(force=True)  # pick up packs another worker just built
+    return {
+        "build": get_build_status(),
+        "worker_pid": os.getpid(),
+        "packs": [
+            {
+                "scenario": p["meta"]["scenario"],
+                "built_at": p["meta"]["built_at"],
+                "routes": len(p["meta"]["routes"]),
+                "graph_nodes": 0 if p["graph_nodes"] is None else len(p["graph_nodes"]),
+            }
+            for p in list(loaded_packs.values())  # a background build may be reloading
+        ]
+    }
@@ -1,28 +1,36 @@
 # orchestrator/orchestrator.py
-from agents.data_analyst import data_analyst
-from agents.medic_coordinator import medic_coordinator
-from agents.logistics_manager import logistics_manager, compute_route_features
-from agents.critic import critic
+from agents.data_analyst import data_analyst, nearby_hazards, fetch_hazard_events, use_hazard_events
+from agents.medic_coordinator import medic_coordinator, fetch_tweets, use_tweets, FALLBACK_TWEETS
+from agents.logistics_manager import logistics_manager, compute_route_features, _geocode
+from agents.critic import critique_findings
+from agents.plan_audit import audit_plan, format_findings
+from agents.region_packs import pack_hazard_events
+from orchestrator.stage_cache import stage_cache, normalize_scenario
+from orchestrator.singleflight import SingleFlight
+from orchestrator.streaming import token_callbacks
 from geopy.geocoders import Nominatim
 
 
-def generate_geojson(scenario: str):
+def generate_geojson(scenario: str, location=None, route_pack=None):
     """
     Generate crisis GeoJSON features:
       - Damage zones (random demo points)
       - Routes & staging nodes from Logistics Manager
+    `location` (lat, lon) and `route_pack` may be passed in to skip recomputing them.
     """
-    geolocator = Nominatim(user_agent="swarm-aid")
-    location = None
-    try:
-        location = geolocator.geocode(scenario, timeout=5)
-    except Exception:
-        pass
+    if location is None:
+        geolocator = Nominatim(user_agent="swarm-aid")
+        try:
+            loc = geolocator.geocode(scenario, timeout=5)
+            if loc:
+                location = (loc.latitude, loc.longitude)
+        except Exception:
+            pass
 
     if not location:
         return {"type": "FeatureCollection", "features": []}
 
-    lat, lon = location.latitude, location.longitude
+    lat, lon = location
     features = []
 
     # Example Damage Zone A
@@ -49,12 +57,12 @@ def generate_geojson(scenario: str):
 
     # ✅ Add Logistics Manager route features
     try:
-        route_pack = compute_route_features(scenario)
+        if route_pack is None:
+            route_pack = compute_route_features(scenario)
         for f in route_pack["features"]:
-            if "properties" not in f:
-                f["properties"] = {}
-            f["properties"]["type"] = "route"   # ✅ tag all logistics routes
-        features.extend(route_pack["features"])
+            # Copy so cached route packs are not mutated
+            f = {**f, "properties": {**f.get("properties", {}), "type": "route"}}   # ✅ tag all logistics routes
+            features.append(f)
     except Exception as e:
         print(f"⚠️ Logistics route generation failed: {e}")
         # If routing fails, continue with damage zones only
@@ -62,17 +70,86 @@ def generate_geojson(scenario: str):
     return {"type": "FeatureCollection", "features": features}
 
 
-def run_simulation(scenario: str):
+# ✅ Coalesces concurrent identical /simulate requests (per process)
+simulation_flight = SingleFlight()
+
+
+def run_simulation(scenario: str, on_token=None):
+    """
+    Concurrent calls for the same normalized scenario share one in-flight
+    execution. Streaming calls (on_token) always run on their own, since each
+    needs its own token callbacks.
+    """
+    if on_token is not None:
+        return _run_simulation(scenario, on_token=on_token)
+
+    result, shared = simulation_flight.do(normalize_scenario(scenario), lambda: _run_simulation(scenario))
+    # Shallow copy so every caller gets its own scenario string + coalesced flag
+    return {**result, "scenario": scenario, "coalesced": shared}
+
+
+def _run_simulation(scenario: str, on_token=None):
     """
     Orchestrates the 4 agents to analyze a crisis scenario step by step,
     and produces both logs + GeoJSON.
+    If given, on_token(agent, text) receives each agent's LLM tokens as they arrive.
+
+    Each stage is keyed by a fingerprint of its inputs; on a rerun of the same
+    scenario only stages whose inputs changed are recomputed (see stage_cache.py).
     """
 
     logs = []
+    run = stage_cache.begin(scenario)
+
+    # 0. Inputs: geocode, hazard window, social window, route
+    try:
+        location = run.stage(
+            "geocode", {"scenario": scenario}, lambda: _geocode(scenario),
+            cacheable=lambda loc: loc is not None,
+        )
+    except Exception:
+        location = None
+
+    # Region-pack scenarios use their own (fresh enough) hazard index; others go live
+    events = pack_hazard_events(scenario)
+    if events is None:
+        events = fetch_hazard_events()  # None → agent falls back to demo hazards
+    # Fingerprint the filtered hazard list, so only changes near the scenario count
+    nearby = nearby_hazards(location[0], location[1], events) if location and events is not None else None
+    run.stage("hazards", {"location": location, "nearby": nearby}, lambda: nearby)
+
+    # Fetched once here; the Medic's Tweet Analyzer reuses it via use_tweets
+    try:
+        tweets = fetch_tweets(f"{scenario} disaster medical injuries hospitals damage")
+    except Exception as e:
+        tweets = e  # agent falls back to sample tweets
+    social = FALLBACK_TWEETS if isinstance(tweets, Exception) else tweets
+    run.stage("social", {"tweets": social}, lambda: social)
+
+    try:
+        # Routing failures come back as a text-only pack; don't cache those
+        # The plan text is generated here, so stream it under its own label
+        route_pack = run.stage(
+            "route", {"location": location},
+            lambda: compute_route_features(
+                scenario, callbacks=token_callbacks("Logistics Manager (GeoJSON)", on_token)
+            ),
+            cacheable=lambda pack: bool(pack.get("features")),
+        )
+    except Exception as e:
+        route_pack = {"summary": f"⚠️ Error: {e}", "features": []}
 
     # 1. Data Analyst
     try:
-        analysis = data_analyst.run(f"Analyze damage zones for: {scenario}")
+        prompt = f"Analyze damage zones for: {scenario}"
+        with use_hazard_events(events):  # EONET tool reuses the events fetched above
+            analysis = run.stage(
+                "agent:data_analyst",
+                {"prompt": prompt, "hazards": run.fingerprints["hazards"]},
+                lambda: data_analyst.run(
+                    prompt, callbacks=token_callbacks("Data Analyst", on_token, final_answer_only=True)
+                ),
+            )
         logs.append({"agent": "Data Analyst", "response": analysis})
     except Exception as e:
         analysis = f"⚠️ Error: {e}"
@@ -80,7 +157,15 @@ def run_simulation(scenario: str):
 
     # 2. Medic Coordinator
     try:
-        triage = medic_coordinator.run(f"Prioritize medical needs based on {analysis}")
+        prompt = f"Prioritize medical needs based on {analysis}"
+        with use_tweets(tweets):  # Tweet Analyzer reuses the window fetched above
+            triage = run.stage(
+                "agent:medic_coordinator",
+                {"prompt": prompt, "social": run.fingerprints["social"]},
+                lambda: medic_coordinator.run(
+                    prompt, callbacks=token_callbacks("Medic Coordinator", on_token, final_answer_only=True)
+                ),
+            )
         logs.append({"agent": "Medic Coordinator", "response": triage})
         # 🔹 If in future we add geo features for triage, set `type: triage`
     except Exception as e:
@@ -90,8 +175,14 @@ def run_simulation(scenario: str):
     # 3. Logistics Manager
     try:
         # Get both the textual plan (via agent) and GeoJSON features (via compute_route_features)
-        routes_text = logistics_manager.run(f"Plan safe supply routes based on {analysis} and {triage}")
-        route_pack = compute_route_features(scenario)
+        prompt = f"Plan safe supply routes based on {analysis} and {triage}"
+        routes_text = run.stage(
+            "agent:logistics_manager",
+            {"prompt": prompt, "route": run.fingerprints["route"]},
+            lambda: logistics_manager.run(
+                prompt, callbacks=token_callbacks("Logistics Manager", on_token, final_answer_only=True)
+            ),
+        )
         logs.append({"agent": "Logistics Manager", "response": routes_text})
         if route_pack.get("summary"):
             logs.append({"agent": "Logistics Manager (GeoJSON)", "response": route_pack["summary"]})
@@ -99,14 +190,20 @@ def run_simulation(scenario: str):
         routes_text = f"⚠️ Error: {e}"
         logs.append({"agent": "Logistics Manager", "response": routes_text})
 
-    # 4. Critic Agent
+    # ✅ Build final GeoJSON (reuses the geocode + route stages)
+    geojson = generate_geojson(scenario, location=location, route_pack=route_pack)
+
+    # 4. Critic: local geometry audit first, then one compact LLM critique of the findings
+    findings = audit_plan(geojson["features"], hazards=nearby)
+    logs.append({"agent": "Critic (Audit)", "response": format_findings(findings)})
     try:
-        critique = critic.run(f"Audit this plan: Analysis={analysis}, Triage={triage}, Routes={routes_text}")
+        critique = run.stage(
+            "agent:critic",
+            {"findings": findings, "routes": routes_text},
+            lambda: critique_findings(scenario, findings, routes_text, callbacks=token_callbacks("Critic", on_token)),
+        )
         logs.append({"agent": "Critic", "response": critique})
     except Exception as e:
         logs.append({"agent": "Critic", "response": f"⚠️ Error: {e}"})
 
-    # ✅ Build final GeoJSON
-    geojson = generate_geojson(scenario)
-
-    return {"scenario": scenario, "logs": logs, "geojson": geojson}
+    return {"scenario": scenario, "logs": logs, "geojson": geojson, "stages": run.report()}
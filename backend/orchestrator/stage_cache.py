@@ -0,0 +1,90 @@
+# orchestrator/stage_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.state_backend import cache_key, get_json, set_json, STAGE_TTL_S
+
+
+def fingerprint(inputs: Any) -> str:
+    """
+    Stable short hash of JSON-able stage inputs.
+    """
+    blob = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_scenario(scenario: str) -> str:
+    return " ".join(scenario.split()).casefold()
+
+
+class StageRun:
+    """
+    One simulation run: recomputes a stage only if its input fingerprint
+    differs from the last run of the same scenario.
+    """
+
+    def __init__(self, cache: "StageCache", scope: str):
+        self._cache = cache
+        self._scope = scope
+        self.fingerprints: Dict[str, str] = {}
+        self.reused: List[str] = []
+        self.recomputed: List[str] = []
+
+    def stage(
+        self,
+        name: str,
+        inputs: Any,
+        compute: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        `cacheable(value)` returning False keeps a degraded output (e.g. a failed
+        geocode) out of the cache, so the next run retries it.
+        """
+        fp = fingerprint(inputs)
+        self.fingerprints[name] = fp
+
+        hit, value = self._cache.lookup(self._scope, name, fp)
+        if hit:
+            self.reused.append(name)
+            return value
+
+        # Exceptions propagate and nothing is stored, so failures are retried next run
+        value = compute()
+        if cacheable is None or cacheable(value):
+            self._cache.store(self._scope, name, fp, value)
+        self.recomputed.append(name)
+        return value
+
+    def report(self) -> Dict[str, Any]:
+        return {"reused": self.reused, "recomputed": self.recomputed}
+
+
+class StageCache:
+    """
+    Last (fingerprint, output) per stage, per scenario, kept in the shared
+    state backend so every worker sees the same entries. Entries expire after
+    STAGE_TTL_S.
+    """
+
+    def __init__(self, ttl: float = STAGE_TTL_S):
+        self.ttl = ttl
+
+    def begin(self, scenario: str) -> StageRun:
+        return StageRun(self, normalize_scenario(scenario))
+
+    def lookup(self, scope: str, stage: str, fp: str) -> Tuple[bool, Any]:
+        hit, entry = get_json(cache_key("stage", scope, stage))
+        if not hit or entry.get("fp") != fp:
+            return False, None
+        return True, entry.get("value")
+
+    def store(self, scope: str, stage: str, fp: str, value: Any) -> None:
+        set_json(cache_key("stage", scope, stage), {"fp": fp, "value": value}, self.ttl)
+
+
+# ✅ Shared cache used by run_simulation
+stage_cache = StageCache()
@@ -0,0 +1,219 @@
+# orchestrator/streaming.py
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Max events buffered per stream before tokens start being coalesced
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+# Max simulations streaming at once per worker; further streams wait their turn
+STREAM_MAX_CONCURRENCY = int(os.getenv("STREAM_MAX_CONCURRENCY", "8"))
+
+FINAL_ANSWER = "Final Answer:"
+
+
+class TokenForwarder(BaseCallbackHandler):
+    """
+    LangChain callback: forwards every new LLM token as on_token(agent, token).
+    Requires the ChatOpenAI client to be built with streaming=True.
+
+    With final_answer_only=True (ReAct agents), only the text after
+    "Final Answer:" is forwarded, i.e. what the agent returns. The
+    Thought/Action/Observation scaffolding and LLM calls made inside tools
+    never produce that marker, so they are dropped.
+    """
+
+    def __init__(self, agent: str, on_token: Callable[[str, str], None], final_answer_only: bool = False):
+        self.agent = agent
+        self.on_token = on_token
+        self.final_answer_only = final_answer_only
+        self._buffers: Dict[Any, str] = {}  # run_id → text so far, until its final answer starts
+        self._answering: Dict[Any, bool] = {}  # run_id → still stripping leading whitespace
+
+    def on_llm_new_token(self, token: str, *, run_id: Any = None, **kwargs: Any) -> None:
+        if not token:
+            return
+        if not self.final_answer_only:
+            self.on_token(self.agent, token)
+            return
+
+        if run_id not in self._answering:
+            text = self._buffers.get(run_id, "") + token
+            idx = text.find(FINAL_ANSWER)
+            if idx < 0:
+                self._buffers[run_id] = text
+                return
+            self._buffers.pop(run_id, None)
+            self._answering[run_id] = True
+            token = text[idx + len(FINAL_ANSWER):]
+
+        if self._answering[run_id]:
+            token = token.lstrip()
+            if not token:
+                return
+            self._answering[run_id] = False
+        self.on_token(self.agent, token)
+
+    def on_llm_end(self, response: Any, *, run_id: Any = None, **kwargs: Any) -> None:
+        self._buffers.pop(run_id, None)
+        self._answering.pop(run_id, None)
+
+
+def token_callbacks(
+    agent: str,
+    on_token: Optional[Callable[[str, str], None]],
+    final_answer_only: bool = False,
+) -> Optional[List[TokenForwarder]]:
+    return [TokenForwarder(agent, on_token, final_answer_only)] if on_token else None
+
+
+class TokenStream:
+    """
+    Bounded queue between the simulation thread (producer) and the HTTP
+    response (consumer).
+
+    Backpressure: the LLM producer never blocks on a slow client. When the
+    queue is full, tokens are held back and merged, then sent as one larger
+    chunk once the client catches up, so no text is lost. Once the client
+    disconnects, everything is dropped.
+    """
+
+    DONE = object()  # end-of-stream marker
+
+    def __init__(self, maxsize: int = STREAM_QUEUE_SIZE, notify: Optional[Callable[[], None]] = None):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._pending: List[List[str]] = []  # [[agent, text], ...] not yet enqueued, in order
+        self._notify = notify  # called after every enqueue (wakes an async consumer)
+        self.closed = threading.Event()
+
+    def _enqueue(self, event: Any, timeout: Optional[float] = None) -> None:
+        if timeout is None:
+            self._queue.put_nowait(event)
+        else:
+            self._queue.put(event, timeout=timeout)
+        if self._notify:
+            self._notify()
+
+    def _flush_pending(self) -> None:
+        while self._pending:
+            agent, text = self._pending[0]
+            try:
+                self._enqueue({"event": "token", "agent": agent, "text": text})
+            except queue.Full:
+                return
+            self._pending.pop(0)
+
+    def token(self, agent: str, text: str) -> None:
+        if self.closed.is_set():
+            return
+        with self._lock:
+            self._flush_pending()
+            if self._pending:
+                if self._pending[-1][0] == agent:
+                    self._pending[-1][1] += text
+                else:
+                    self._pending.append([agent, text])
+                return
+            try:
+                self._enqueue({"event": "token", "agent": agent, "text": text})
+            except queue.Full:
+                self._pending.append([agent, text])
+
+    def put(self, event: Any) -> None:
+        """
+        Blocking put for control events (pending tokens go first); gives up if the client left.
+        """
+        with self._lock:
+            while not self.closed.is_set():
+                self._flush_pending()
+                if not self._pending:
+                    break
+                try:
+                    agent, text = self._pending.pop(0)
+                    self._enqueue({"event": "token", "agent": agent, "text": text}, timeout=0.5)
+                except queue.Full:
+                    self._pending.insert(0, [agent, text])
+            while not self.closed.is_set():
+                try:
+                    self._enqueue(event, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+    def finish(self) -> None:
+        self.put(self.DONE)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            event = self._queue.get()
+            if event is self.DONE:
+                return
+            yield event
+
+    def get_nowait(self) -> Any:
+        """
+        Next event (TokenStream.DONE at the end); raises queue.Empty if none is ready.
+        """
+        return self._queue.get_nowait()
+
+
+# Producers run here, so concurrent streams cannot grow threads without limit
+_producers = ThreadPoolExecutor(max_workers=STREAM_MAX_CONCURRENCY, thread_name_prefix="simulate-stream")
+
+
+async def stream_simulation(scenario: str, run: Callable[..., Dict[str, Any]]) -> AsyncIterator[str]:
+    """
+    Runs `run(scenario, on_token=...)` on the bounded stream pool and yields NDJSON lines:
+      {"event": "token", "agent": ..., "text": ...}   partial text, as generated
+      {"event": "result", "data": {...}}              the full run_simulation result
+      {"event": "error", "message": ...}
+    The consumer awaits on the event loop, so a waiting client holds no thread.
+    """
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+
+    def wake():
+        try:
+            loop.call_soon_threadsafe(ready.set)
+        except RuntimeError:  # loop already closed (server shutting down)
+            pass
+
+    stream = TokenStream(notify=wake)
+
+    def worker():
+        if stream.closed.is_set():  # client left while this run was queued
+            return
+        try:
+            stream.put({"event": "result", "data": run(scenario, on_token=stream.token)})
+        except Exception as e:
+            stream.put({"event": "error", "message": str(e)})
+        finally:
+            stream.finish()
+
+    _producers.submit(worker)
+    try:
+        while True:
+            try:
+                event = stream.get_nowait()
+            except queue.Empty:
+                ready.clear()
+                try:
+                    # Re-check after clear: an event enqueued just before would otherwise be missed
+                    event = stream.get_nowait()
+                except queue.Empty:
+                    await ready.wait()
+                    continue
+            if event is TokenStream.DONE:
+                return
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    finally:
+        # Client disconnected or stream ended: unblock and silence the producer
+        stream.closed.set()
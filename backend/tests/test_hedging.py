@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from agents.hedging import hedged_call
+
+
+def _sleep_then(seconds, value):
+    def fn():
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+def _fail(seconds=0.0):
+    def fn():
+        time.sleep(seconds)
+        raise RuntimeError("upstream down")
+    return fn
+
+
+def test_fast_primary_wins_without_secondary():
+    calls = []
+    label, value = hedged_call(_sleep_then(0.01, "p"), lambda: calls.append(1), delay_s=0.5)
+    assert (label, value) == ("primary", "p")
+    assert calls == []
+
+
+def test_instant_secondary_bounds_latency():
+    # Regression: a secondary finishing before the wait loop must still win
+    for _ in range(20):
+        t0 = time.perf_counter()
+        label, value = hedged_call(_sleep_then(0.5, "p"), lambda: "s", delay_s=0.05)
+        assert (label, value) == ("secondary", "s")
+        assert time.perf_counter() - t0 < 0.3
+
+
+def test_secondary_returning_none_is_a_success():
+    # The EONET hedge uses `lambda: None` to mean "use demo hazards"
+    t0 = time.perf_counter()
+    assert hedged_call(_sleep_then(1.0, ["event"]), lambda: None, delay_s=0.05) == ("secondary", None)
+    assert time.perf_counter() - t0 < 0.5
+
+
+def test_fast_primary_failure_falls_back_immediately():
+    t0 = time.perf_counter()
+    assert hedged_call(_fail(), _sleep_then(0.01, "s"), delay_s=5) == ("secondary", "s")
+    assert time.perf_counter() - t0 < 1
+
+
+def test_primary_used_when_secondary_fails():
+    assert hedged_call(_sleep_then(0.2, "p"), _fail(), delay_s=0.05) == ("primary", "p")
+
+
+def test_both_failing_raises_upstream_error():
+    with pytest.raises(RuntimeError, match="upstream down"):
+        hedged_call(_fail(0.1), _fail(), delay_s=0.01)
+
+
+def test_concurrent_hedges_do_not_queue_behind_slow_losers():
+    # Many more slow primaries in flight than the old 32-thread pool could hold
+    from concurrent.futures import ThreadPoolExecutor
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=64) as pool:
+        results = list(pool.map(
+            lambda _: hedged_call(_sleep_then(1.0, "p"), lambda: "s", delay_s=0.05), range(64)
+        ))
+    assert results == [("secondary", "s")] * 64
+    assert time.perf_counter() - t0 < 0.8
+
+
+def test_hedged_legs_get_the_short_request_timeout():
+    from agents import hedging
+
+    seen = []
+    hedged_call(lambda: seen.append(hedging.request_timeout(30)) or "p", lambda: None, delay_s=1)
+    assert seen == [min(30, hedging.HEDGE_TIMEOUT_S)]
+    assert hedging.request_timeout(30) == 30
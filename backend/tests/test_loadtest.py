@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from loadtest import run_load
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.1)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_open_loop_counts_client_side_queueing(base_url):
+    # 1 worker, ~50 arrivals/s, 100 ms service: requests pile up client-side,
+    # so tail latency must grow well beyond the service time
+    report = run_load(base_url, ["Tokyo"], concurrency=1, rate=50, duration_s=0.5)
+    assert report["errors"] == {}
+    assert report["latency_ms"]["p99"] > 1000
+
+
+def test_closed_loop_reports_service_time(base_url):
+    report = run_load(base_url, ["Tokyo"], concurrency=4, requests=8)
+    assert report["ok"] == 8
+    assert report["latency_ms"]["p50"] < 1000
+
+
+def test_sampler_includes_server_thread_but_not_its_own():
+    from loadtest import StackSampler
+
+    stop = threading.Event()
+
+    def server_loop():
+        while not stop.is_set():
+            time.sleep(0.001)
+
+    def client_loop():
+        while not stop.is_set():
+            time.sleep(0.001)
+
+    threads = [
+        threading.Thread(target=server_loop, name="loadtest-server", daemon=True),
+        threading.Thread(target=client_loop, name="loadtest-client_0", daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    sampler = StackSampler(interval_s=0.001).start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+
+    stacks = "\n".join(sampler.stacks)
+    assert "server_loop" in stacks
+    assert "client_loop" not in stacks
+    assert "_loop (loadtest.py" not in stacks
+
+
+class _CoalescingHandler(BaseHTTPRequestHandler):
+    """Fake /simulate that counts scenarios like SingleFlight and serves /metrics."""
+
+    seen = []
+    counters = {"requests": 0, "executions": 0, "coalesced": 0}
+
+    def do_GET(self):
+        from urllib.parse import parse_qs, urlparse
+
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            body = json.dumps({"simulate_coalescing": dict(self.counters)}).encode()
+        else:
+            scenario = parse_qs(url.query)["scenario"][0]
+            self.counters["requests"] += 1
+            key = "coalesced" if scenario in self.seen else "executions"
+            self.counters[key] += 1
+            self.seen.append(scenario)
+            body = b"{}"
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.parametrize("unique", [False, True])
+def test_unique_scenarios_defeat_coalescing_and_report_metrics(unique):
+    _CoalescingHandler.seen = []
+    _CoalescingHandler.counters = {"requests": 5, "executions": 5, "coalesced": 0}  # earlier traffic
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CoalescingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        report = run_load(
+            f"http://127.0.0.1:{server.server_port}", ["Tokyo", "Lahore"],
+            concurrency=1, requests=6, unique_scenarios=unique,
+        )
+    finally:
+        server.shutdown()
+
+    assert len(set(_CoalescingHandler.seen)) == (6 if unique else 2)
+    assert report["coalescing"]["requests"] == 6
+    assert report["coalescing"]["coalesced"] == (0 if unique else 4)
+
+
+def test_report_without_metrics_endpoint(base_url):
+    # The slow fake answers /metrics with "{}": no counters to report
+    assert run_load(base_url, ["Tokyo"], concurrency=1, requests=1)["coalescing"] is None
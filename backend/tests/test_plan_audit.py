@@ -0,0 +1,117 @@
+import random
+
+from agents.plan_audit import (
+    HAZARD_BUFFER_KM,
+    ZONE_BUFFER_KM,
+    SegmentGrid,
+    _point_segment_km,
+    audit_plan,
+    format_findings,
+)
+
+# At the equator 0.01° ≈ 1.1 km in both directions
+STAGING, HOSPITAL = [0.0, 0.0], [0.1, 0.0]
+
+
+def route(coords=(STAGING, [0.05, 0.0], HOSPITAL), distance_km=12.0, duration_min=15.0):
+    return {
+        "type": "Feature",
+        "properties": {"name": "Staging → Hospital", "distance_km": distance_km, "duration_min": duration_min},
+        "geometry": {"type": "LineString", "coordinates": [list(c) for c in coords]},
+    }
+
+
+def point(name, coords, **props):
+    return {"type": "Feature", "properties": {"name": name, **props}, "geometry": {"type": "Point", "coordinates": coords}}
+
+
+def zone(name, coords, severity):
+    return point(name, coords, severity=severity, type="damage")
+
+
+def plan(*extra, route_feature=None, staging=STAGING, hospital=HOSPITAL):
+    features = [route_feature or route()]
+    if staging:
+        features.append(point("Staging Base", staging))
+    if hospital:
+        features.append(point("Field Hospital", hospital))
+    return features + list(extra)
+
+
+def checks(findings):
+    return [(f["level"], f["check"]) for f in findings]
+
+
+def test_clean_plan_is_ok():
+    findings = audit_plan(plan(zone("Far", [0.05, 0.05], "severe")))
+    assert checks(findings) == [("ok", "all")]
+    assert format_findings(findings) == "- [OK] all: No geometric issues found."
+
+
+def test_no_route_is_critical():
+    assert checks(audit_plan([point("Staging Base", STAGING)])) == [("critical", "route")]
+
+
+def test_damage_zone_inside_buffer_depends_on_severity():
+    near = [0.05, 0.01]  # ~1.1 km from the route
+    assert 1.1 < ZONE_BUFFER_KM
+    assert checks(audit_plan(plan(zone("A", near, "severe")))) == [("critical", "damage_zone")]
+    assert checks(audit_plan(plan(zone("B", near, "moderate")))) == [("warning", "damage_zone")]
+    # ~3.3 km away: outside the buffer
+    assert checks(audit_plan(plan(zone("C", [0.05, 0.03], "severe")))) == [("ok", "all")]
+
+
+def test_hazard_buffer():
+    near = {"title": "Wildfire", "category": "Wildfires", "lat": 0.05, "lon": 0.05}  # ~5.5 km
+    far = {"title": "Volcano", "lat": 0.5, "lon": 0.05}
+    assert 5.5 < HAZARD_BUFFER_KM
+    findings = audit_plan(plan(), hazards=[near, far, {"title": "No coords"}])
+    assert checks(findings) == [("warning", "hazard")]
+    assert "Wildfire" in findings[0]["message"]
+
+
+def test_implausible_speed():
+    findings = audit_plan(plan(route_feature=route(duration_min=1.0)))  # 720 km/h
+    assert checks(findings) == [("warning", "timing")]
+
+
+def test_detour_ratio():
+    findings = audit_plan(plan(route_feature=route(distance_km=50.0, duration_min=45.0)))  # 4.5x, 67 km/h
+    assert checks(findings) == [("warning", "detour")]
+
+
+def test_missing_marker():
+    assert checks(audit_plan(plan(hospital=None))) == [("critical", "coverage")]
+    assert checks(audit_plan(plan(staging=None))) == [("critical", "coverage")]
+
+
+def test_route_not_reaching_endpoint():
+    findings = audit_plan(plan(hospital=[0.2, 0.0]))  # ~11 km past the route's end
+    assert checks(findings) == [("critical", "coverage")]
+    assert "field hospital" in findings[0]["message"]
+
+
+def test_segment_grid_matches_brute_force_on_multi_cell_line():
+    rnd = random.Random(7)
+    line, x, y = [], 0.0, 0.0
+    for _ in range(200):
+        x, y = x + rnd.uniform(-3, 3), y + rnd.uniform(-3, 3)
+        line.append((x, y))
+    grid = SegmentGrid(cell_km=2.0)
+    grid.add_line(line)
+    assert len(grid.cells) > 20
+
+    segments = list(zip(line, line[1:]))
+    xs, ys = [x for x, _ in line], [y for _, y in line]
+    hits = 0
+    for _ in range(300):
+        p = (rnd.uniform(min(xs), max(xs)), rnd.uniform(min(ys), max(ys)))
+        radius = rnd.choice([0.5, 2.0, 5.0])
+        brute = min(_point_segment_km(p, a, b) for a, b in segments)
+        got = grid.nearest_km(p, radius)
+        if brute <= radius:
+            assert got is not None and abs(got - brute) < 1e-9
+            hits += 1
+        else:
+            assert got is None
+    assert hits > 50
@@ -0,0 +1,62 @@
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_openai")
+
+from agents import region_packs
+from agents.logistics_manager import _geocode
+from agents.state_backend import get_json
+
+
+def _write_pack(pack_dir, scenario, hazard_events, hazards_at):
+    os.makedirs(os.path.join(pack_dir, region_packs._slug(scenario)), exist_ok=True)
+    meta = {
+        "scenario": scenario,
+        "built_at": time.time(),
+        "location": [35.68, 139.76],
+        "points": {"center": [35.68, 139.76], "staging": [35.53, 139.61], "hospital": [35.78, 139.86]},
+        "labels": ["center", "staging", "hospital"],
+        "routes": {},
+        "hazard_events": hazard_events,
+        "hazards_at": hazards_at,
+        "ors": False,
+    }
+    with open(os.path.join(pack_dir, region_packs._slug(scenario), "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+
+
+@pytest.fixture
+def pack_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(region_packs, "REGION_PACKS_DIR", str(tmp_path))
+    monkeypatch.setattr(region_packs, "loaded_packs", {})
+    return str(tmp_path)
+
+
+def test_any_spelling_of_a_pack_scenario_hits_the_pack(pack_dir):
+    _write_pack(pack_dir, "Tokyo Earthquake", [{"title": "Quake"}], time.time())
+    assert region_packs.load_region_packs() == ["Tokyo Earthquake"]
+
+    assert region_packs.pack_hazard_events("  tokyo   EARTHQUAKE ") == [{"title": "Quake"}]
+    assert get_json(_geocode.cache_key("tokyo earthquake")) == (True, [35.68, 139.76])
+
+
+def test_stale_hazard_index_is_ignored(pack_dir):
+    _write_pack(pack_dir, "Lahore flood", [{"title": "Flood"}], time.time() - region_packs.REGION_PACK_HAZARD_MAX_AGE_S - 1)
+    region_packs.load_region_packs()
+    assert region_packs.get_region_pack("lahore flood") is not None
+    assert region_packs.pack_hazard_events("lahore flood") is None
+
+
+def test_workers_pick_up_packs_rebuilt_elsewhere(pack_dir):
+    region_packs.load_region_packs()
+    assert region_packs.get_region_pack("Tokyo earthquake") is None
+
+    # Another worker builds a pack: this one notices on its next check
+    _write_pack(pack_dir, "Tokyo earthquake", [{"title": "Quake"}], time.time())
+    assert region_packs.refresh_region_packs(force=True)
+    assert region_packs.pack_hazard_events("Tokyo earthquake") == [{"title": "Quake"}]
+    assert not region_packs.refresh_region_packs(force=True)
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from orchestrator.singleflight import SingleFlight
+
+
+def _run_concurrently(n, target):
+    barrier = threading.Barrier(n)
+    results, errors = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    sf = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"answer": 42}
+
+    results, errors = _run_concurrently(8, lambda: sf.do("tokyo earthquake", fn))
+    assert errors == []
+    assert calls == [1]
+    assert all(value == {"answer": 42} for value, _ in results)
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+
+    m = sf.metrics()
+    assert (m["requests"], m["executions"], m["coalesced"]) == (8, 1, 7)
+    assert m["coalescing_ratio"] == 0.875
+    assert m["in_flight"] == 0
+
+
+def test_different_keys_run_independently():
+    sf = SingleFlight()
+    assert sf.do("a", lambda: 1) == (1, False)
+    assert sf.do("b", lambda: 2) == (2, False)
+    assert sf.metrics()["executions"] == 2
+
+
+def test_nothing_is_cached_after_completion():
+    sf = SingleFlight()
+    sf.do("a", lambda: 1)
+    assert sf.do("a", lambda: 2) == (2, False)
+
+
+def test_exception_is_shared_and_key_released():
+    sf = SingleFlight()
+
+    def boom():
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+
+    results, errors = _run_concurrently(4, lambda: sf.do("k", boom))
+    assert results == []
+    assert len(errors) == 4 and all(isinstance(e, ValueError) for e in errors)
+    assert sf.do("k", lambda: "ok") == ("ok", False)
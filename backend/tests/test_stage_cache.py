@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+from orchestrator.stage_cache import StageCache, fingerprint, normalize_scenario
+
+
+@pytest.fixture
+def scenario():
+    # Unique per test: the cache lives in the process-wide state backend
+    return f"Test City {uuid.uuid4().hex} earthquake"
+
+
+def test_unchanged_inputs_are_reused(scenario):
+    cache = StageCache()
+    calls = []
+
+    first = cache.begin(scenario)
+    assert first.stage("route", {"loc": [1, 2]}, lambda: calls.append(1) or {"km": 3}) == {"km": 3}
+    assert first.report() == {"reused": [], "recomputed": ["route"]}
+
+    second = cache.begin(scenario.upper() + "  ")
+    assert second.stage("route", {"loc": [1, 2]}, lambda: calls.append(1) or {"km": 9}) == {"km": 3}
+    assert second.report() == {"reused": ["route"], "recomputed": []}
+    assert calls == [1]
+
+
+def test_changed_inputs_recompute(scenario):
+    cache = StageCache()
+    cache.begin(scenario).stage("social", {"tweets": ["a"]}, lambda: "old")
+    run = cache.begin(scenario)
+    assert run.stage("social", {"tweets": ["b"]}, lambda: "new") == "new"
+    assert run.report()["recomputed"] == ["social"]
+    assert run.fingerprints["social"] == fingerprint({"tweets": ["b"]})
+
+
+def test_uncacheable_output_is_retried(scenario):
+    cache = StageCache()
+    not_none = lambda v: v is not None
+    assert cache.begin(scenario).stage("geocode", {"s": 1}, lambda: None, cacheable=not_none) is None
+    run = cache.begin(scenario)
+    assert run.stage("geocode", {"s": 1}, lambda: (35.6, 139.7), cacheable=not_none) == (35.6, 139.7)
+    assert run.report()["recomputed"] == ["geocode"]
+    assert cache.begin(scenario).stage("geocode", {"s": 1}, lambda: None, cacheable=not_none) == [35.6, 139.7]
+
+
+def test_exceptions_are_not_cached(scenario):
+    cache = StageCache()
+
+    def boom():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        cache.begin(scenario).stage("route", {}, boom)
+    assert cache.begin(scenario).stage("route", {}, lambda: "ok") == "ok"
+
+
+def test_normalize_scenario():
+    assert normalize_scenario("  Tokyo \t Earthquake ") == "tokyo earthquake"
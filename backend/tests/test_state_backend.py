@@ -0,0 +1,202 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from agents import state_backend
+from agents.state_backend import (
+    MemoryBackend,
+    RedisBackend,
+    SQLiteBackend,
+    get_json,
+    make_backend,
+    set_json,
+    shared_cache,
+)
+
+
+class _FakeRedis:
+    """Minimal Redis stand-in that rejects non-positive expiries like the real server."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, ex=None, px=None):
+        for v in (ex, px):
+            if v is not None and v <= 0:
+                raise ValueError("invalid expire time in 'set' command")
+        ttl = ex if ex is not None else (px / 1000.0 if px is not None else None)
+        self.data[key] = (value.encode("utf-8"), time.time() + ttl if ttl else None)
+
+    def get(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires < time.time():
+            return None
+        return value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_redis_backend_roundtrip_and_sub_second_ttl():
+    backend = RedisBackend(client=_FakeRedis())
+    backend.set("k", "v")
+    assert backend.get("k") == "v"
+
+    backend.set("short", "v", ttl=0.05)
+    assert backend.get("short") == "v"
+    time.sleep(0.1)
+    assert backend.get("short") is None
+
+
+# ----------------- SQLite -----------------
+def test_sqlite_backend_roundtrip_and_ttl(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "state.sqlite3"))
+    assert backend.get("k") is None
+    backend.set("k", "v")
+    assert backend.get("k") == "v"
+    backend.set("k", "v2")
+    assert backend.get("k") == "v2"
+    backend.delete("k")
+    assert backend.get("k") is None
+
+    backend.set("short", "v", ttl=0.05)
+    assert backend.get("short") == "v"
+    time.sleep(0.1)
+    assert backend.get("short") is None
+
+
+def test_sqlite_entries_are_shared_between_connections_and_processes(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    a, b = SQLiteBackend(path), SQLiteBackend(path)
+    a.set("geocode:x", "[1, 2]")
+    assert b.get("geocode:x") == "[1, 2]"
+
+    # Another worker process writes; this one reads it back
+    subprocess.run(
+        [sys.executable, "-c",
+         "import sys; from agents.state_backend import SQLiteBackend; "
+         "SQLiteBackend(sys.argv[1]).set('route:y', 'from-child')", path],
+        check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert a.get("route:y") == "from-child"
+
+
+def test_sqlite_sweep_drops_expired_rows_and_caps_size(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "state.sqlite3"), max_entries=3, sweep_every=1)
+    backend.set("expiring", "v", ttl=0.01)
+    time.sleep(0.05)
+    for i in range(5):
+        backend.set(f"k{i}", str(i))
+
+    rows = backend._conn().execute("SELECT key FROM kv ORDER BY rowid").fetchall()
+    assert [r[0] for r in rows] == ["k2", "k3", "k4"]
+
+
+# ----------------- Memory -----------------
+def test_memory_backend_is_a_bounded_lru_with_ttl():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    assert backend.get("a") == "1"  # "b" is now least recently used
+    backend.set("c", "3")
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == ("1", None, "3")
+
+    backend.set("short", "v", ttl=0.05)
+    time.sleep(0.1)
+    assert backend.get("short") is None
+
+
+# ----------------- make_backend -----------------
+def test_make_backend_parses_specs(tmp_path, monkeypatch):
+    assert isinstance(make_backend("memory"), MemoryBackend)
+
+    path = str(tmp_path / "custom.sqlite3")
+    backend = make_backend(f"sqlite:///{path}")
+    assert isinstance(backend, SQLiteBackend) and backend.path == path
+
+    urls = []
+    monkeypatch.setattr(state_backend, "RedisBackend", lambda url: urls.append(url) or "redis")
+    assert make_backend(" redis://cache:6379/1 ") == "redis"
+    assert urls == ["redis://cache:6379/1"]
+
+    monkeypatch.setenv("SWARM_STATE_BACKEND", "memory")
+    assert isinstance(make_backend(), MemoryBackend)
+
+    with pytest.raises(ValueError):
+        make_backend("postgres://db")
+
+
+# ----------------- shared_cache / get_json -----------------
+@pytest.fixture
+def fresh_state(monkeypatch):
+    backend = MemoryBackend()
+    monkeypatch.setattr(state_backend, "state", backend)
+    return backend
+
+
+def test_shared_cache_reuses_results_and_decodes(fresh_state):
+    calls = []
+
+    @shared_cache("test:geo", decode=tuple)
+    def geocode(place):
+        calls.append(place)
+        return (1.5, 2.5)
+
+    assert geocode("x") == (1.5, 2.5)
+    assert geocode("x") == (1.5, 2.5)  # JSON list decoded back into a tuple
+    assert isinstance(geocode("x"), tuple)
+    assert calls == ["x"]
+
+    geocode.prime([9.0, 9.0], "y")
+    assert geocode("y") == (9.0, 9.0)
+    assert calls == ["x"]
+
+
+def test_shared_cache_skips_none_and_exceptions(fresh_state):
+    calls = []
+
+    @shared_cache("test:maybe", cache_none=False)
+    def lookup(place):
+        calls.append(place)
+        if place == "boom":
+            raise RuntimeError("upstream down")
+        return None
+
+    assert lookup("nowhere") is None
+    assert lookup("nowhere") is None
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            lookup("boom")
+    assert calls == ["nowhere", "nowhere", "boom", "boom"]
+
+    @shared_cache("test:none")
+    def always_none():
+        calls.append("none")
+
+    always_none()
+    always_none()
+    assert calls.count("none") == 1
+
+
+def test_get_json_treats_corrupt_entries_as_miss(fresh_state):
+    fresh_state.set("bad", "{not json")
+    assert get_json("bad") == (False, None)
+    set_json("good", {"a": 1})
+    assert get_json("good") == (True, {"a": 1})
+
+
+def test_shared_cache_key_normalizes_arguments(fresh_state):
+    calls = []
+
+    @shared_cache("test:norm", key=lambda place: place.strip().lower())
+    def geocode(place):
+        calls.append(place)
+        return [1, 2]
+
+    geocode.prime([3, 4], "Tokyo")
+    assert geocode("  TOKYO ") == [3, 4]
+    assert geocode.cache_key("tokyo") == geocode.cache_key("Tokyo ")
+    assert calls == []
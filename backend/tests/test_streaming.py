@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from orchestrator import streaming
+from orchestrator.streaming import TokenForwarder, TokenStream, stream_simulation
+
+
+def _drain_concurrently(stream, *events):
+    def producer():
+        for e in events:
+            stream.put(e)
+        stream.finish()
+
+    threading.Thread(target=producer).start()
+    return list(stream)
+
+
+def _collect(scenario, run):
+    async def main():
+        return [json.loads(line) async for line in stream_simulation(scenario, run)]
+    return asyncio.run(main())
+
+
+def test_full_queue_coalesces_tokens_without_loss():
+    stream = TokenStream(maxsize=4)
+    for agent in ("A", "B"):
+        for i in range(50):
+            stream.token(agent, f"{i},")  # never blocks, even with no consumer
+
+    events = _drain_concurrently(stream, {"event": "result"})
+    text = {}
+    for e in events[:-1]:
+        text[e["agent"]] = text.get(e["agent"], "") + e["text"]
+
+    expected = "".join(f"{i}," for i in range(50))
+    assert text == {"A": expected, "B": expected}
+    assert events[-1] == {"event": "result"}
+    assert len(events) < 100  # tokens were merged into larger chunks
+
+
+def test_closed_stream_drops_tokens_and_unblocks_put():
+    stream = TokenStream(maxsize=1)
+    stream.closed.set()
+    stream.token("A", "x")
+    t0 = time.perf_counter()
+    stream.put({"event": "result"})
+    assert time.perf_counter() - t0 < 1
+
+
+def test_stream_simulation_emits_tokens_then_result():
+    def run(scenario, on_token):
+        on_token("Critic", "hello ")
+        on_token("Critic", "world")
+        return {"scenario": scenario}
+
+    events = _collect("Tokyo", run)
+    assert "".join(e["text"] for e in events if e["event"] == "token") == "hello world"
+    assert events[-1] == {"event": "result", "data": {"scenario": "Tokyo"}}
+
+
+def test_stream_simulation_reports_errors():
+    def run(scenario, on_token):
+        raise RuntimeError("llm quota")
+
+    events = _collect("Tokyo", run)
+    assert events == [{"event": "error", "message": "llm quota"}]
+
+
+def test_concurrent_streams_share_a_bounded_producer_pool():
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def run(scenario, on_token):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        on_token("Critic", scenario)
+        with lock:
+            running[0] -= 1
+        return {"scenario": scenario}
+
+    async def one(i):
+        return [json.loads(line) async for line in stream_simulation(f"s{i}", run)]
+
+    async def main():
+        return await asyncio.gather(*(one(i) for i in range(3 * streaming.STREAM_MAX_CONCURRENCY)))
+
+    results = asyncio.run(main())
+    assert all(r[-1] == {"event": "result", "data": {"scenario": f"s{i}"}} for i, r in enumerate(results))
+    assert peak[0] <= streaming.STREAM_MAX_CONCURRENCY
+
+
+def _feed(forwarder, chunks, run_id):
+    for chunk in chunks:
+        forwarder.on_llm_new_token(chunk, run_id=run_id)
+    forwarder.on_llm_end(None, run_id=run_id)
+
+
+def test_react_agents_forward_only_the_final_answer():
+    got = []
+    fwd = TokenForwarder("Medic Coordinator", lambda agent, text: got.append(text), final_answer_only=True)
+
+    # Scaffolding turn, an LLM call inside a tool, then the final turn (marker split across tokens)
+    _feed(fwd, ["Thought: check", " tweets\nAction: Tweet Analyzer\nAction Input: x"], uuid.uuid4())
+    _feed(fwd, ["Burn units ", "are overwhelmed."], uuid.uuid4())
+    _feed(fwd, ["Thought: done\nFinal ", "Answer", ":", " ", " Open", " two burn wards."], uuid.uuid4())
+
+    assert "".join(got) == "Open two burn wards."
+
+
+def test_plain_forwarder_passes_every_token():
+    got = []
+    fwd = TokenForwarder("Critic", lambda agent, text: got.append((agent, text)))
+    _feed(fwd, ["a", "", "b"], uuid.uuid4())
+    assert got == [("Critic", "a"), ("Critic", "b")]
+
+
+def test_client_disconnect_releases_the_producer():
+    finished = threading.Event()
+
+    def run(scenario, on_token):
+        for i in range(5000):
+            on_token("Critic", f"{i} ")
+        finished.set()
+        return {"scenario": scenario}
+
+    async def main():
+        gen = stream_simulation("Tokyo", run)
+        first = json.loads(await gen.__anext__())
+        await gen.aclose()  # client went away
+        return first
+
+    assert asyncio.run(main())["event"] == "token"
+    assert finished.wait(2)
@@ -0,0 +1,68 @@
+import json
+
+from agents.triage_classifier import DEFAULT_CATEGORIES, TriageClassifier, load_categories
+
+
+def cat(name, keywords, severity="moderate"):
+    return {"name": name, "severity": severity, "offset": [0.0, 0.0], "keywords": keywords}
+
+
+def names(matches):
+    return {m["name"]: m["count"] for m in matches}
+
+
+def test_overlapping_keywords_report_every_category():
+    clf = TriageClassifier([cat("A", ["casualty"]), cat("B", ["mass casualty"])])
+    assert names(clf.classify("Mass casualty reported")) == {"A": 1, "B": 1}
+
+
+def test_shared_keyword_counts_for_every_category():
+    clf = TriageClassifier([cat("A", ["icu"]), cat("B", ["icu", "ventilator"])])
+    assert names(clf.classify("ICU full, icu beds gone, no ventilator")) == {"A": 2, "B": 3}
+
+
+def test_prefix_keywords_in_one_category_count_once_per_spot():
+    clf = TriageClassifier([cat("Burns", ["burn", "burn units"])])
+    assert names(clf.classify("burn units full; more burn victims")) == {"Burns": 2}
+
+
+def test_keywords_are_normalized_and_match_whole_words():
+    clf = TriageClassifier([cat("Burns", [" burn "]), cat("Trauma", ["trauma   care"])])
+    assert names(clf.classify("Need trauma\tcare and BURN dressings")) == {"Burns": 1, "Trauma": 1}
+    assert clf.classify("heartburn and traumatic care") == []
+
+
+def test_results_follow_config_order_with_metadata():
+    clf = TriageClassifier([cat("A", ["x"], "severe"), cat("B", ["y"])])
+    assert clf.classify("y then x") == [
+        {"name": "A", "severity": "severe", "offset": (0.0, 0.0), "count": 1},
+        {"name": "B", "severity": "moderate", "offset": (0.0, 0.0), "count": 1},
+    ]
+    assert clf.classify("") == []
+    assert TriageClassifier([]).classify("anything") == []
+
+
+def test_load_categories_reads_valid_file(tmp_path):
+    path = tmp_path / "cats.json"
+    path.write_text(json.dumps([cat("Water", ["thirst"])]))
+    assert load_categories(str(path)) == [cat("Water", ["thirst"])]
+
+
+def test_load_categories_falls_back_on_bad_config(tmp_path):
+    bad = [
+        {"name": "not a list"},
+        [{"severity": "severe", "keywords": ["x"]}],
+        [{"name": "A", "keywords": ["x"]}],
+        [{"name": "A", "severity": "severe", "keywords": "x"}],
+        [{"name": "A", "severity": "severe", "keywords": ["x"], "offset": [1]}],
+        ["just a string"],
+    ]
+    for i, config in enumerate(bad):
+        path = tmp_path / f"bad{i}.json"
+        path.write_text(json.dumps(config))
+        assert load_categories(str(path)) is DEFAULT_CATEGORIES, config
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json")
+    assert load_categories(str(broken)) is DEFAULT_CATEGORIES
+    assert load_categories(str(tmp_path / "missing.json")) is DEFAULT_CATEGORIES